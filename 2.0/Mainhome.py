@@ -1,4 +1,7 @@
 import flet as ft
+from cache_views import ao_reexibir, invalidar_views
+from imagens import src_imagem
+from login import SESSAO_ADMIN, sessao_admin
 
 def home_view(page: ft.Page):
     # Configurações da página
@@ -42,21 +45,22 @@ def home_view(page: ft.Page):
     # Título
     titulo_width = int(container_width * 0.7) if container_width else 250
     titulo = ft.Image(
-        src="2.0/hometitulo.png",
+        src=src_imagem("hometitulo.png", titulo_width),
         width=titulo_width,
         height=80,
         fit=ft.ImageFit.CONTAIN,
     )
 
     # Faixa translúcida de saudação
+    saudacao_text = ft.Text(
+        f"Bem-vindo, {user}!",
+        size=18,
+        color=ft.Colors.WHITE,
+        text_align=ft.TextAlign.CENTER,
+        weight=ft.FontWeight.W_500,
+    )
     saudacao_container = ft.Container(
-        content=ft.Text(
-            f"Bem-vindo, {user}!",
-            size=18,
-            color=ft.Colors.WHITE,
-            text_align=ft.TextAlign.CENTER,
-            weight=ft.FontWeight.W_500,
-        ),
+        content=saudacao_text,
         bgcolor=ft.Colors.WHITE10,
         border_radius=10,
         padding=10,
@@ -89,6 +93,54 @@ def home_view(page: ft.Page):
         spacing=0
     )
 
+    btn_meus = ft.Column(
+        controls=[
+            ft.IconButton(
+                icon=ft.Icons.EVENT_NOTE,
+                icon_color=ft.Colors.BLUE_700,
+                icon_size=70,
+                tooltip="Meus agendamentos",
+                on_click=lambda _: page.go("/meus-agendamentos"),
+                style=ft.ButtonStyle(bgcolor=None),
+            ),
+            ft.Text(
+                "Agenda",
+                color=ft.Colors.WHITE,
+                size=16,
+                text_align=ft.TextAlign.CENTER,
+                weight=ft.FontWeight.BOLD,
+                font_family="Verdana"
+            )
+        ],
+        alignment=ft.MainAxisAlignment.CENTER,
+        spacing=0
+    )
+
+    # Painel do administrador (só aparece para a conta admin)
+    btn_painel = ft.Column(
+        controls=[
+            ft.IconButton(
+                icon=ft.Icons.INSIGHTS,
+                icon_color=ft.Colors.BLUE_700,
+                icon_size=70,
+                tooltip="Painel do administrador",
+                on_click=lambda _: page.go("/admin"),
+                style=ft.ButtonStyle(bgcolor=None),
+            ),
+            ft.Text(
+                "Painel",
+                color=ft.Colors.WHITE,
+                size=16,
+                text_align=ft.TextAlign.CENTER,
+                weight=ft.FontWeight.BOLD,
+                font_family="Verdana"
+            )
+        ],
+        alignment=ft.MainAxisAlignment.CENTER,
+        spacing=0,
+        visible=sessao_admin(page),
+    )
+
     # Botão de logout (em nova linha)
     btn_logout = ft.Column(
         controls=[
@@ -99,7 +151,9 @@ def home_view(page: ft.Page):
                 tooltip="Sair",
                 on_click=lambda _: (
                     page.session.remove("user"),
+                    page.session.remove(SESSAO_ADMIN),
                     page.client_storage.remove("logged_user"),
+                    invalidar_views(page),
                     page.go("/login"),
                     page.update()
                 ),
@@ -118,9 +172,9 @@ def home_view(page: ft.Page):
         spacing=2
     )
 
-    # Linha superior de botões (apenas cortes)
+    # Linha superior de botões (cortes e agendamentos do usuário)
     botoes_grid = ft.Row(
-        controls=[btn2],
+        controls=[btn2, btn_meus, btn_painel],
         alignment=ft.MainAxisAlignment.CENTER,
         spacing=20,
     )
@@ -156,11 +210,17 @@ def home_view(page: ft.Page):
         shadow=ft.BoxShadow(color=ft.Colors.BLACK, blur_radius=5, offset=ft.Offset(2, 2))
     )
 
+    # Ao voltar para /home com a view em cache, só a saudação muda
+    def reexibir():
+        usuario = page.session.get("user") or page.client_storage.get("logged_user") or "usuário"
+        saudacao_text.value = f"Bem-vindo, {usuario}!"
+        btn_painel.visible = sessao_admin(page)
+
     # Retornar coluna principal (container no topo)
-    return ft.Column(
+    return ao_reexibir(ft.Column(
         controls=[container_principal],
         alignment=ft.MainAxisAlignment.START,
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         expand=True
-    )
+    ), reexibir)
     ##bgcolor="#5a7889",
\ No newline at end of file
@@ -1,52 +1,220 @@
 import flet as ft
-import json
+import logging
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import date, datetime
+# Arquivos e backends de armazenamento de agendamentos
+from repositorio import get_repositorio
+from disponibilidade import IndiceDisponibilidade
+from indice_usuarios import IndiceUsuarios
+from agregados import Agregados
+from reservas import ResultadoReserva, StatusReserva, chave_do_dia, reservar
+from cache_views import ao_descartar, ao_reexibir
+from metricas import cronometrar
+from eventos_agenda import AssinaturaAgenda, LIVRE, OCUPADO, publicar_ocupado
+from calendario import CELULAS, SEMANAS, grade_mes, semanas_usadas, somar_meses
+from expediente import Expediente
+from servicos import duracao_servico
+from registros import formatar_data, formatar_horario, minuto_de_horario
 
 # Usar Colors do flet diretamente
 Colors = ft.Colors
 
-# Arquivo de armazenamento de agendamentos
-DATA_DIR = "storage"
-AGENDAMENTOS_FILE = os.path.join(DATA_DIR, "agendamentos.json")
-
-# Horários disponíveis para agendamento
-HORARIOS_DISPONIVEIS = [
-    "09:00", "09:30", "10:00", "10:30", "11:00", "11:30",
-    "12:00", "13:00", "13:30", "14:00", "14:30", "15:00", "15:30", "16:00",
-    "16:30", "17:00"
+# Cadeiras/barbeiros da barbearia. "turnos" é opcional e substitui, por dia da
+# semana (0=segunda), o expediente padrão de expediente.py para aquele barbeiro,
+# ex.: "turnos": {5: [("09:00", "13:00")]} para trabalhar só de manhã no sábado
+# (dias ausentes do dicionário ficam fechados)
+BARBEIROS = [
+    {"id": 1, "nome": "Barbeiro 1"},
+    {"id": 2, "nome": "Barbeiro 2"},
+    {"id": 3, "nome": "Barbeiro 3"},
 ]
+EXPEDIENTE = Expediente(BARBEIROS)
+
+# Horários de início possíveis, em minutos do dia (união dos turnos de todos
+# os barbeiros); cada dia abre só os que caem no expediente de algum barbeiro
+HORARIOS_DISPONIVEIS = EXPEDIENTE.minutos
+
+# Quantos meses à frente o calendário permite navegar
+MESES_A_FRENTE = 6
+
+# Índice de ocupação por dia, construído uma vez por processo
+_indice = None
+_indice_lock = threading.Lock()
+
+# Agendamentos por usuário (tela "Meus agendamentos"), também um por processo;
+# refeito quando o armazenamento muda
+_indice_usuarios = None
+_indice_usuarios_lock = threading.Lock()
+
+# Intervalo (s) da verificação do índice contra o armazenamento em segundo plano (0 desliga)
+VERIFICAR_INDICE_S = float(os.getenv("VERIFICAR_INDICE_S", "300"))
+_verificacao_iniciada = False
+
+logger = logging.getLogger("agendamento")
+
+# Totais por dia do painel do administrador (arquivo compartilhado entre processos)
+AGREGADOS = Agregados()
 
 def ensure_agendamentos_storage():
-    """Garante que o arquivo de agendamentos existe"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    if not os.path.exists(AGENDAMENTOS_FILE):
-        with open(AGENDAMENTOS_FILE, "w", encoding="utf-8") as f:
-            json.dump({"agendamentos": []}, f, indent=2, ensure_ascii=False)
+    """Garante que o armazenamento de agendamentos existe"""
+    get_repositorio().garantir_armazenamento()
 
+@cronometrar("barbearia_armazenamento_segundos", operacao="load_agendamentos")
 def load_agendamentos():
     """Carrega todos os agendamentos"""
-    ensure_agendamentos_storage()
-    try:
-        with open(AGENDAMENTOS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data.get("agendamentos", [])
-    except Exception:
-        return []
+    return get_repositorio().listar()
+
+@cronometrar("barbearia_armazenamento_segundos", operacao="load_agendamentos_ativos")
+def load_agendamentos_ativos():
+    """Agendamentos de hoje em diante: é o que a agenda e o índice usam"""
+    return get_repositorio().listar_ativos(date.today().toordinal())
 
+@cronometrar("barbearia_armazenamento_segundos", operacao="save_agendamentos")
 def save_agendamentos(agendamentos):
-    """Salva agendamentos no arquivo"""
-    ensure_agendamentos_storage()
-    with open(AGENDAMENTOS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"agendamentos": agendamentos}, f, indent=2, ensure_ascii=False)
-
-def get_horarios_disponiveis_dia(data_str: str):
-    """Retorna horários disponíveis para um determinado dia"""
-    agendamentos = load_agendamentos()
-    horarios_ocupados = [
-        a["horario"] for a in agendamentos if a["data"] == data_str
-    ]
-    return [h for h in HORARIOS_DISPONIVEIS if h not in horarios_ocupados]
+    """Salva agendamentos no armazenamento"""
+    get_repositorio().salvar_todos(agendamentos)
+    if _indice is not None:
+        _indice.construir(load_agendamentos_ativos())
+    if _indice_usuarios is not None:
+        _indice_usuarios.construir(load_agendamentos(), get_repositorio().assinatura())
+    AGREGADOS.reconstruir(load_agendamentos)
+
+def preparar_agregados():
+    """Calcula os agregados do painel a partir do armazenamento se ainda não existirem"""
+    if not os.path.exists(AGREGADOS.caminho):
+        AGREGADOS.reconstruir(load_agendamentos)
+
+def get_indice_disponibilidade() -> IndiceDisponibilidade:
+    """Retorna o índice de disponibilidade, construindo-o na primeira chamada"""
+    global _indice
+    if _indice is None:
+        with _indice_lock:
+            if _indice is None:
+                indice = IndiceDisponibilidade(EXPEDIENTE)
+                indice.construir(load_agendamentos_ativos())
+                _indice = indice
+    return _indice
+
+def get_indice_usuarios() -> IndiceUsuarios:
+    """Retorna o índice de agendamentos por usuário, em dia com o armazenamento
+
+    Construído na primeira chamada e refeito quando a assinatura do
+    armazenamento mudou desde a construção: outro processo (ou este, numa
+    reserva) gravou. A assinatura é lida antes da listagem, então uma
+    gravação durante a releitura só adianta a próxima reconstrução.
+    """
+    global _indice_usuarios
+    repositorio = get_repositorio()
+    assinatura = repositorio.assinatura()
+    indice = _indice_usuarios
+    if indice is None or indice.assinatura != assinatura:
+        with _indice_usuarios_lock:
+            indice = _indice_usuarios
+            if indice is None or indice.assinatura != assinatura:
+                assinatura = repositorio.assinatura()
+                if indice is None:
+                    indice = IndiceUsuarios()
+                indice.construir(load_agendamentos(), assinatura)
+                _indice_usuarios = indice
+    return indice
+
+def verificar_indice_disponibilidade():
+    """Confere o índice contra o armazenamento e corrige os dias divergentes
+
+    Cada dia divergente é relido sob a trava do dia, como na reserva: uma
+    reserva feita entre a leitura e a comparação não é desfeita pela
+    correção. Dias passados ficam de fora (o armazenamento só devolve os
+    ativos). Retorna as divergências encontradas.
+    """
+    indice = get_indice_disponibilidade()
+    repositorio = get_repositorio()
+    divergencias = indice.verificar_consistencia(load_agendamentos_ativos(), desde=date.today().toordinal())
+    for dia, _, _ in divergencias:
+        with repositorio.trava.trava(chave_do_dia(dia)):
+            indice.atualizar_dia(dia, repositorio.agendamentos_do_dia(dia))
+    return divergencias
+
+def iniciar_verificacao_indice(intervalo: float = VERIFICAR_INDICE_S):
+    """Roda verificar_indice_disponibilidade a cada `intervalo` segundos, numa thread por processo"""
+    global _verificacao_iniciada
+    if intervalo <= 0 or _verificacao_iniciada:
+        return
+    with _indice_lock:
+        if _verificacao_iniciada:
+            return
+        _verificacao_iniciada = True
+
+    def verificar_periodicamente():
+        while True:
+            time.sleep(intervalo)
+            try:
+                divergencias = verificar_indice_disponibilidade()
+            except Exception:
+                logger.exception("falha ao verificar o índice de disponibilidade")
+                continue
+            if divergencias:
+                logger.warning(
+                    "índice de disponibilidade divergia do armazenamento em %d dia(s), corrigido(s): %s",
+                    len(divergencias), ", ".join(formatar_data(dia) for dia, _, _ in divergencias),
+                )
+
+    threading.Thread(target=verificar_periodicamente, name="verificar-indice", daemon=True).start()
+
+def get_horarios_disponiveis_dia(dia: int, duracao=None, barbeiro=None):
+    """Retorna os inícios (minutos do dia) em que um serviço de `duracao` minutos cabe no dia
+
+    Sem barbeiro, basta haver uma cadeira livre pelo intervalo inteiro.
+    """
+    return get_indice_disponibilidade().livres(dia, duracao, barbeiro)
+
+def buscar_proximos_horarios(servico=None, a_partir_de: date | None = None, janela=None,
+                             quantidade: int = 1, barbeiro=None):
+    """Próximos horários livres para o serviço, a partir de uma data (padrão: agora)
+
+    janela: ("HH:MM", "HH:MM") opcional. Usa só o índice em memória (não
+    relê o armazenamento por dia). Retorna [(dia ordinal, minuto), ...].
+    """
+    agora = datetime.now()
+    inicio = max(a_partir_de or agora.date(), agora.date())
+    minuto_minimo = agora.hour * 60 + agora.minute if inicio == agora.date() else None
+    return get_indice_disponibilidade().proximos(
+        inicio.toordinal(),
+        duracao_servico(servico),
+        quantidade,
+        cadeira=barbeiro,
+        janela=tuple(minuto_de_horario(h) for h in janela) if janela else None,
+        minuto_minimo=minuto_minimo,
+        # só até o último mês que o calendário deixa navegar
+        horizonte=(fim_do_calendario(agora.date()) - inicio).days,
+    )
+
+def fim_do_calendario(hoje: date) -> date:
+    """Primeiro dia depois do último mês navegável no calendário"""
+    ano, mes = somar_meses(hoje.year, hoje.month, MESES_A_FRENTE + 1)
+    return date(ano, mes, 1)
+
+def nome_barbeiro(cadeira) -> str:
+    return EXPEDIENTE.nomes.get(cadeira, f"Cadeira {cadeira}")
+
+@cronometrar("barbearia_armazenamento_segundos", operacao="reservar_horario")
+def reservar_horario(agendamento, barbeiro=None) -> ResultadoReserva:
+    """Reserva o horário de forma atômica (sem sobrescrever reservas concorrentes)
+
+    A cadeira atribuída volta em resultado.agendamento["cadeira"].
+    """
+    resultado = reservar(get_repositorio(), get_indice_disponibilidade(), agendamento, barbeiro)
+    if resultado.ok:
+        try:
+            AGREGADOS.registrar(resultado.agendamento)
+        except Exception:
+            # a reserva já está gravada: falhar aqui mostraria erro de uma reserva
+            # confirmada. Os totais do dia ficam curtos até `agregados.py reconstruir`
+            logger.exception("reserva do dia %s gravada, mas não somada aos agregados", resultado.agendamento["dia"])
+        if _indice_usuarios is not None:
+            _indice_usuarios.adicionar(resultado.agendamento)
+    return resultado
 
 def snackbar(page: ft.Page, msg: str, *, bg=Colors.BLUE_GREY_900, color=Colors.WHITE):
     """Mostra uma notificação na tela"""
@@ -69,6 +237,7 @@ def agendamento_view(page: ft.Page) -> ft.Column:
     # Estado da view
     data_selecionada = {"value": None}
     horario_selecionado = {"value": None}
+    barbeiro_selecionado = {"value": None}  # None = sem preferência
     
     # Botão de voltar
     back_btn = ft.IconButton(
@@ -147,186 +316,275 @@ def agendamento_view(page: ft.Page) -> ft.Column:
 
         # (removido campo de observações e seleção de serviço por solicitação)
 
-    def gerar_calendario():
-        """Gera o calendário do mês atual"""
-        hoje = datetime.now()
-        primeiro_dia = datetime(hoje.year, hoje.month, 1)
-        month_title = primeiro_dia.strftime("%B %Y")
-        
-        # Encontrar o dia da semana do primeiro dia (0=segunda, 6=domingo)
-        primeiro_dia_semana = primeiro_dia.weekday()
-        
-        # Calcular última data do mês
-        if hoje.month == 12:
-            ultimo_dia = datetime(hoje.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            ultimo_dia = datetime(hoje.year, hoje.month + 1, 1) - timedelta(days=1)
-        
-        # Cabeçalho com nome do mês e dias da semana
-        month_text = ft.Text(month_title, size=14, weight=ft.FontWeight.BOLD, color=Colors.WHITE)
-        dias_semana = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sab", "Dom"]
-        header_dias = ft.Row(
-            controls=[
-                ft.Container(
-                    content=ft.Text(dia, size=10, weight=ft.FontWeight.BOLD, color=Colors.WHITE),
-                    width=38,
-                    height=28,
-                    alignment=ft.alignment.center
-                )
-                for dia in dias_semana
-            ],
-            spacing=3,
+    # Mês exibido no calendário (navegação limitada ao mês atual e aos próximos)
+    hoje = date.today()
+    mes_exibido = {"ano": hoje.year, "mes": hoje.month}
+
+    def selecionar_data(e):
+        """Handler único das células de dia: o dia (ordinal) vem de control.data"""
+        if not e.control.data:
+            return
+        escolher_data(e.control.data)
+        page.update()
+
+    def escolher_data(dia):
+        data_selecionada["value"] = dia
+        # assina antes de ler a disponibilidade para não perder reservas no meio
+        assinatura.seguir(dia)
+        data_label.value = f"Data selecionada: {formatar_data(dia)}"
+        resumo_texts["data"].value = f"Data: {formatar_data(dia)}"
+        horario_selecionado["value"] = None
+        horario_label.value = "Selecione um horário"
+        atualizar_horarios()
+        # atualizar_resumo removed — update resumo inline when needed
+        resumo_container.visible = False
+
+    # Cabeçalho com nome do mês, navegação e dias da semana
+    month_text = ft.Text("", size=14, weight=ft.FontWeight.BOLD, color=Colors.WHITE)
+    btn_mes_anterior = ft.IconButton(
+        icon=ft.Icons.CHEVRON_LEFT,
+        icon_color=Colors.WHITE,
+        on_click=lambda _: mudar_mes(-1),
+    )
+    btn_mes_seguinte = ft.IconButton(
+        icon=ft.Icons.CHEVRON_RIGHT,
+        icon_color=Colors.WHITE,
+        on_click=lambda _: mudar_mes(1),
+    )
+    dias_semana = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sab", "Dom"]
+    header_dias = ft.Row(
+        controls=[
+            ft.Container(
+                content=ft.Text(dia, size=10, weight=ft.FontWeight.BOLD, color=Colors.WHITE),
+                width=38,
+                height=28,
+                alignment=ft.alignment.center
+            )
+            for dia in dias_semana
+        ],
+        spacing=3,
+        alignment=ft.MainAxisAlignment.CENTER
+    )
+
+    # Células de dia criadas uma única vez; trocar de mês só altera propriedades
+    celulas_dia = [
+        ft.Container(
+            content=ft.Text("", size=10, color=Colors.WHITE, weight=ft.FontWeight.BOLD),
+            width=38,
+            height=38,
+            border_radius=6,
+            alignment=ft.alignment.center,
+            on_click=selecionar_data,
+        )
+        for _ in range(CELULAS)
+    ]
+    linhas_semana = [
+        ft.Row(
+            controls=celulas_dia[semana * 7:(semana + 1) * 7],
+            spacing=5,
             alignment=ft.MainAxisAlignment.CENTER
         )
-        
-        # Criar linhas de dias
-        linhas = [header_dias]
-        semana_atual = []
-        
-        # Preencher espaços vazios antes do primeiro dia
-        for _ in range(primeiro_dia_semana):
-            semana_atual.append(ft.Container(width=40))
-        
-        # Preencher os dias do mês
-        for dia in range(1, ultimo_dia.day + 1):
-            data = datetime(hoje.year, hoje.month, dia)
-            data_str = data.strftime("%d/%m/%Y")
-            
+        for semana in range(SEMANAS)
+    ]
+
+    def renderizar_mes():
+        """Aplica o modelo memoizado do mês às células existentes"""
+        hoje = date.today()
+        atual = (hoje.year, hoje.month)
+        if (mes_exibido["ano"], mes_exibido["mes"]) < atual:
+            mes_exibido["ano"], mes_exibido["mes"] = atual
+        ano, mes = mes_exibido["ano"], mes_exibido["mes"]
+        month_text.value = date(ano, mes, 1).strftime("%B %Y")
+        hoje_ordinal = hoje.toordinal()
+        for celula, dia in zip(celulas_dia, grade_mes(ano, mes)):
+            if dia is None:
+                # fora do mês: espaço vazio
+                celula.data = None
+                celula.content.value = ""
+                celula.bgcolor = None
+                celula.opacity = 1.0
+                celula.disabled = True
+                continue
+            numero, ordinal = dia
             # Desabilitar datas passadas
-            eh_passado = data < hoje.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            def criar_btn_dia(d, data_formatada):
-                def selecionar_data(_):
-                    data_selecionada["value"] = data_formatada
-                    data_label.value = f"Data selecionada: {data_formatada}"
-                    resumo_texts["data"].value = f"Data: {data_formatada}"
-                    horario_selecionado["value"] = None
-                    horario_label.value = "Selecione um horário"
-                    atualizar_horarios()
-                    # atualizar_resumo removed — update resumo inline when needed
-                    resumo_container.visible = False
-                    page.update()
-                
-                return ft.Container(
-                    content=ft.Text(
-                        str(d),
-                        size=10,
-                        color=Colors.WHITE if not eh_passado else Colors.BLUE_GREY_400,
-                        weight=ft.FontWeight.BOLD
-                    ),
-                    width=38,
-                    height=38,
-                    bgcolor=Colors.BLUE_600 if not eh_passado else Colors.BLUE_GREY_700,
-                    border_radius=6,
-                    alignment=ft.alignment.center,
-                    on_click=selecionar_data if not eh_passado else None,
-                    opacity=1.0 if not eh_passado else 0.5
-                )
-            
-            btn = criar_btn_dia(dia, data_str)
-            semana_atual.append(btn)
-            
-            # Quando completar uma semana, adicionar à linha
-            if len(semana_atual) == 7:
-                linhas.append(ft.Row(
-                    controls=semana_atual,
-                    spacing=5,
-                    alignment=ft.MainAxisAlignment.CENTER
-                ))
-                semana_atual = []
-        
-        # Preencher espaços vazios da última semana
-        while len(semana_atual) < 7:
-            semana_atual.append(ft.Container(width=40))
-        if semana_atual:
-            linhas.append(ft.Row(
-                controls=semana_atual,
-                spacing=5,
-                alignment=ft.MainAxisAlignment.CENTER
-            ))
-        
-        # incluir o título do mês acima das linhas
-        controls = [month_text, header_dias] + linhas[1:]
+            eh_passado = ordinal < hoje_ordinal
+            celula.data = ordinal
+            celula.content.value = str(numero)
+            celula.content.color = Colors.WHITE if not eh_passado else Colors.BLUE_GREY_400
+            celula.bgcolor = Colors.BLUE_600 if not eh_passado else Colors.BLUE_GREY_700
+            celula.opacity = 1.0 if not eh_passado else 0.5
+            celula.disabled = eh_passado
+        usadas = semanas_usadas(ano, mes)
+        for i, linha in enumerate(linhas_semana):
+            linha.visible = i < usadas
+        btn_mes_anterior.disabled = (ano, mes) <= atual
+        btn_mes_seguinte.disabled = (ano, mes) >= somar_meses(*atual, MESES_A_FRENTE)
+
+    def mudar_mes(delta):
+        mes_exibido["ano"], mes_exibido["mes"] = somar_meses(mes_exibido["ano"], mes_exibido["mes"], delta)
+        renderizar_mes()
+        page.update()
+
+    def gerar_calendario():
+        """Monta o calendário (uma vez por view) e exibe o mês atual"""
+        renderizar_mes()
         return ft.Column(
-            controls=controls,
+            controls=[
+                ft.Row(
+                    controls=[btn_mes_anterior, month_text, btn_mes_seguinte],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                ),
+                header_dias,
+            ] + linhas_semana,
             spacing=3,
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
         )
 
+    def selecionar_horario(e):
+        """Handler único dos horários: o minuto do dia vem de control.data"""
+        escolher_horario(e.control.data)
+        page.update()
+
+    def escolher_horario(minuto):
+        horario_selecionado["value"] = minuto
+        h = formatar_horario(minuto)
+        horario_label.value = f"Horário selecionado: {h}"
+        # atualizar resumo com horário e serviço selecionado
+        resumo_texts["horario"].value = f"Horário: {h}"
+        resumo_texts["servico"].value = f"Serviço: {page.session.get('selected_service') or 'Nenhum'}"
+        resumo_container.visible = True
+        pintar_horarios()
+
+    # Grade de horários criada uma única vez (um control por horário possível);
+    # trocar de data só altera o estado livre/ocupado/selecionado de cada um
+    aviso_horarios = ft.Text("", color=Colors.AMBER_600, visible=False)
+    slots_horario = [
+        ft.Container(
+            content=ft.Text(formatar_horario(m), size=11, color=Colors.WHITE, weight=ft.FontWeight.BOLD),
+            width=60,
+            height=38,
+            bgcolor=Colors.GREEN_600,
+            border_radius=6,
+            alignment=ft.alignment.center,
+            on_click=selecionar_horario,
+            data=m,
+        )
+        for m in HORARIOS_DISPONIVEIS
+    ]
+    grade_horarios = ft.Column(
+        controls=[
+            ft.Row(
+                controls=slots_horario[i:i + 4],
+                spacing=4,
+                alignment=ft.MainAxisAlignment.CENTER
+            )
+            for i in range(0, len(slots_horario), 4)
+        ],
+        spacing=10,
+        visible=False,
+    )
+    horarios_container.controls.extend([aviso_horarios, grade_horarios])
+    horarios_livres = {"value": set()}
+
+    def pintar_horarios():
+        """Aplica livre/ocupado/selecionado a cada horário (só muda o que for diferente)"""
+        livres = horarios_livres["value"]
+        for slot in slots_horario:
+            livre = slot.data in livres
+            selecionado = livre and slot.data == horario_selecionado["value"]
+            slot.disabled = not livre
+            slot.opacity = 1.0 if livre else 0.4
+            slot.bgcolor = Colors.AMBER_700 if selecionado else (Colors.GREEN_600 if livre else Colors.BLUE_GREY_700)
+            slot.border = ft.border.all(2, Colors.WHITE) if selecionado else None
+
+    def selecionar_barbeiro(e):
+        """Preferência de barbeiro: muda quais horários estão livres"""
+        barbeiro_selecionado["value"] = int(e.control.value) or None
+        if data_selecionada["value"]:
+            atualizar_horarios()
+        page.update()
+
+    # Preferência de barbeiro ("0" = qualquer cadeira livre)
+    barbeiro_dropdown = ft.Dropdown(
+        value="0",
+        options=[ft.dropdown.Option("0", "Sem preferência")]
+        + [ft.dropdown.Option(str(b["id"]), b["nome"]) for b in BARBEIROS],
+        on_change=selecionar_barbeiro,
+        width=250,
+        dense=True,
+        color=Colors.WHITE,
+        border_color=Colors.BLUE_GREY_100,
+    )
+
     def atualizar_horarios():
-        """Atualiza a lista de horários disponíveis"""
-        horarios_container.clean()
-        
+        """Atualiza o estado dos horários para a data selecionada"""
         if not data_selecionada["value"]:
-            horarios_container.controls.append(
-                ft.Text("Selecione uma data primeiro", color=Colors.AMBER_600)
-            )
+            aviso_horarios.value = "Selecione uma data primeiro"
+            aviso_horarios.visible = True
+            grade_horarios.visible = False
             return
-        
-        horarios_disponiveis = get_horarios_disponiveis_dia(data_selecionada["value"])
-        
-        if not horarios_disponiveis:
-            horarios_container.controls.append(
-                ft.Text("Nenhum horário disponível nesta data", color=Colors.AMBER_600)
-            )
+
+        duracao = duracao_servico(page.session.get("selected_service"))
+        horarios_livres["value"] = set(
+            get_horarios_disponiveis_dia(data_selecionada["value"], duracao, barbeiro_selecionado["value"])
+        )
+        exibir_horarios()
+
+    def exibir_horarios():
+        """Mostra a grade (ou o aviso) conforme os horários livres"""
+        livres = horarios_livres["value"]
+        if horario_selecionado["value"] is not None and horario_selecionado["value"] not in livres:
+            horario_selecionado["value"] = None
+            horario_label.value = "Selecione um horário"
+            resumo_container.visible = False
+        pintar_horarios()
+
+        if not livres:
+            aviso_horarios.value = "Nenhum horário disponível nesta data"
+            aviso_horarios.visible = True
+            grade_horarios.visible = False
             return
-        
-        # Criar grade de horários
-        grid_horarios = []
-        linha_atual = []
-        
-        for horario in horarios_disponiveis:
-            def criar_btn_horario(h):
-                def selecionar_horario(_):
-                    horario_selecionado["value"] = h
-                    horario_label.value = f"Horário selecionado: {h}"
-                    # atualizar resumo com horário e serviço selecionado
-                    resumo_texts["horario"].value = f"Horário: {h}"
-                    resumo_texts["servico"].value = f"Serviço: {page.session.get('selected_service') or 'Nenhum'}"
-                    resumo_container.visible = True
-                    page.update()
-                
-                return ft.Container(
-                    content=ft.Text(
-                        h,
-                        size=11,
-                        color=Colors.WHITE,
-                        weight=ft.FontWeight.BOLD
-                    ),
-                    width=60,
-                    height=38,
-                    bgcolor=Colors.GREEN_600,
-                    border_radius=6,
-                    alignment=ft.alignment.center,
-                    on_click=selecionar_horario
-                )
-            
-            btn = criar_btn_horario(horario)
-            linha_atual.append(btn)
-            
-            if len(linha_atual) == 4:
-                grid_horarios.append(ft.Row(
-                    controls=linha_atual,
-                    spacing=4,
-                    alignment=ft.MainAxisAlignment.CENTER
-                ))
-                linha_atual = []
-        
-        if linha_atual:
-            grid_horarios.append(ft.Row(
-                controls=linha_atual,
-                spacing=4,
-                alignment=ft.MainAxisAlignment.CENTER
-            ))
-        
-        horarios_container.controls.extend(grid_horarios)
+        aviso_horarios.visible = False
+        grade_horarios.visible = True
+
+    def aplicar_eventos(eventos):
+        """Reservas feitas em outras sessões para a data exibida (via pubsub)"""
+        # com durações, uma reserva também fecha inícios anteriores a ela:
+        # o lote só sinaliza a mudança e o índice (em memória) é relido
+        if any(evento in (OCUPADO, LIVRE) for evento, _ in eventos):
+            atualizar_horarios()
+
+    assinatura = AssinaturaAgenda(page, aplicar_eventos)
+
+    def ir_para_proximo_livre(_):
+        """Atalho: seleciona o horário livre mais próximo para o serviço e barbeiro escolhidos"""
+        encontrados = buscar_proximos_horarios(
+            page.session.get("selected_service"), barbeiro=barbeiro_selecionado["value"]
+        )
+        if not encontrados:
+            snackbar(page, "Nenhum horário livre nos próximos meses", bg=Colors.RED_400)
+            return
+        dia, minuto = encontrados[0]
+        data = date.fromordinal(dia)
+        mes_exibido["ano"], mes_exibido["mes"] = data.year, data.month
+        renderizar_mes()
+        escolher_data(dia)
+        escolher_horario(minuto)
+        page.update()
+
+    btn_proximo_livre = ft.TextButton(
+        "Próximo horário livre",
+        icon=ft.Icons.UPDATE,
+        on_click=ir_para_proximo_livre,
+        style=ft.ButtonStyle(color=Colors.WHITE),
+    )
 
     def confirmar_agendamento(_):
         """Confirma e salva o agendamento"""
-        if not data_selecionada["value"]:
+        if data_selecionada["value"] is None:
             snackbar(page, "Selecione uma data", bg=Colors.RED_400)
             return
-        if not horario_selecionado["value"]:
+        if horario_selecionado["value"] is None:
             snackbar(page, "Selecione um horário", bg=Colors.RED_400)
             return
         # pegar serviço selecionado (se houver)
@@ -334,29 +592,42 @@ def agendamento_view(page: ft.Page) -> ft.Column:
         
         usuario = page.session.get("user") or page.client_storage.get("logged_user") or "usuário"
         
-        agendamentos = load_agendamentos()
         novo_agendamento = {
             "usuario": usuario,
-            "data": data_selecionada["value"],
-            "horario": horario_selecionado["value"],
+            "dia": data_selecionada["value"],
+            "minuto": horario_selecionado["value"],
+            "duracao": duracao_servico(selected_servico),
             "servico": selected_servico,
             "observacoes": "",
-            "data_criacao": datetime.now().strftime("%d/%m/%Y %H:%M")
+            "criado_em": int(time.time()),
         }
         
-        agendamentos.append(novo_agendamento)
-        save_agendamentos(agendamentos)
+        resultado = reservar_horario(novo_agendamento, barbeiro_selecionado["value"])
+        if not resultado.ok:
+            snackbar(page, resultado.mensagem, bg=Colors.RED_400)
+            if resultado.status is StatusReserva.CONFLITO:
+                horario_selecionado["value"] = None
+                horario_label.value = "Selecione um horário"
+                resumo_container.visible = False
+                atualizar_horarios()
+                page.update()
+            return
         
-        snackbar(page, "Agendamento confirmado com sucesso!", bg=Colors.GREEN_500)
+        # avisa as outras sessões que exibem esta data
+        publicar_ocupado(page, novo_agendamento["dia"], novo_agendamento["minuto"])
+        cadeira = resultado.agendamento["cadeira"]
+        snackbar(page, f"{resultado.mensagem} Barbeiro: {nome_barbeiro(cadeira)}", bg=Colors.GREEN_500)
         
         # Resetar formulário
+        assinatura.seguir(None)
         data_selecionada["value"] = None
         horario_selecionado["value"] = None
         data_label.value = "Selecione uma data"
         horario_label.value = "Selecione um horário"
         # manter seleção de serviço em sessão ou limpar se desejar
         # page.session.remove("selected_service")
-        horarios_container.clean()
+        aviso_horarios.visible = False
+        grade_horarios.visible = False
         
         # atualizar UI e retornar para a tela principal
         page.go("/home")
@@ -385,10 +656,14 @@ def agendamento_view(page: ft.Page) -> ft.Column:
             title,
             ft.Divider(thickness=2, color=ft.Colors.WHITE24),
             ft.Text("CALENDÁRIO", size=12, weight=ft.FontWeight.BOLD, color=Colors.BLUE_GREY_100),
+            btn_proximo_livre,
             calendario_container,
             ft.Container(height=5),
             data_label,
             ft.Divider(thickness=1, color=ft.Colors.WHITE24),
+            ft.Text("BARBEIRO", size=12, weight=ft.FontWeight.BOLD, color=Colors.BLUE_GREY_100),
+            barbeiro_dropdown,
+            ft.Divider(thickness=1, color=ft.Colors.WHITE24),
             ft.Text("HORÁRIOS", size=12, weight=ft.FontWeight.BOLD, color=Colors.BLUE_GREY_100),
             horarios_container,
             ft.Container(height=5),
@@ -438,4 +713,18 @@ def agendamento_view(page: ft.Page) -> ft.Column:
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
     )
 
-    return root
+    # Ao voltar para /agendamento com a view em cache: serviço escolhido e
+    # horários livres do dia selecionado podem ter mudado
+    def reexibir():
+        # o dia pode ter virado desde a construção: recalcula dias passados
+        renderizar_mes()
+        servico = page.session.get("selected_service")
+        service_label.value = f"Serviço: {servico or 'Nenhum selecionado'}"
+        resumo_texts["servico"].value = f"Serviço: {servico or 'Nenhum'}"
+        if data_selecionada["value"]:
+            atualizar_horarios()
+
+    # Fora do cache (LRU ou logout) a view não é mais exibida: para de ouvir a
+    # agenda, senão seguiria atualizando controls soltos a cada evento
+    ao_descartar(root, lambda: assinatura.seguir(None))
+    return ao_reexibir(root, reexibir)
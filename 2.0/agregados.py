@@ -0,0 +1,274 @@
+import json
+import os
+import sys
+import threading
+
+from escrita_duravel import gravar_json
+from expediente import dia_da_semana
+from repositorio import DATA_DIR, get_repositorio
+from servicos import SERVICOS
+from travas import Trava
+
+# Contadores materializados do painel do administrador
+AGREGADOS_FILE = os.path.join(DATA_DIR, "agregados.json")
+
+# Posições da lista de contadores de cada dia
+AGENDAMENTOS, MINUTOS, RECEITA = range(3)
+
+# Chave da trava dos arquivos de agregados (snapshot e journal)
+TRAVA_AGREGADOS = 0
+
+# Linhas do journal de deltas que disparam a incorporação ao snapshot
+COMPACTAR_LINHAS = int(os.getenv("AGREGADOS_COMPACTAR_LINHAS", "1000"))
+
+
+def preco_centavos(servico) -> int:
+    """Preço do serviço em centavos (0 se não estiver em SERVICOS)"""
+    for s in SERVICOS:
+        if s["nome"] == servico:
+            return round(s["preco"] * 100)
+    return 0
+
+
+def contadores(agendamento):
+    """[agendamentos, minutos ocupados, receita em centavos] de um agendamento"""
+    return [1, int(agendamento.get("duracao") or 0), preco_centavos(agendamento.get("servico"))]
+
+
+def calcular(agendamentos):
+    """Agregados por dia recalculados do zero: {dia: [agendamentos, minutos, centavos]}"""
+    por_dia = {}
+    for a in agendamentos:
+        total = por_dia.setdefault(a["dia"], [0, 0, 0])
+        for i, v in enumerate(contadores(a)):
+            total[i] += v
+    return por_dia
+
+
+class Agregados:
+    """Totais por dia de agendamentos, minutos ocupados e receita.
+
+    O caminho de reserva soma cada agendamento confirmado (registrar), em
+    vez de o painel reagregar todo o histórico a cada visita. Como no
+    RepositorioJournal, o estado é um snapshot mais um journal: cada
+    reserva só acrescenta ao journal uma linha com o delta do seu dia, e a
+    cada COMPACTAR_LINHAS linhas o journal é incorporado ao snapshot. Os
+    arquivos são compartilhados entre processos: alterações e releituras
+    são feitas sob trava. `reconstruir` recalcula tudo a partir do
+    armazenamento (ex.: após uma queda entre a gravação da reserva e a dos
+    contadores) e `verificar` só compara.
+    """
+
+    def __init__(self, caminho=AGREGADOS_FILE, journal=None, compactar_linhas: int = COMPACTAR_LINHAS):
+        self.caminho = caminho
+        self.journal = journal or os.path.splitext(caminho)[0] + ".journal"
+        self.compactar_linhas = compactar_linhas
+        self.trava = Trava(caminho + ".lock")
+        self._lock = threading.Lock()
+        self._assinatura = None     # identifica o snapshot carregado
+        self._por_dia = {}
+        self._seq = 0               # último delta aplicado em memória
+        self._offset = 0            # bytes do journal já aplicados em memória
+        self._linhas = 0            # linhas do journal ainda não compactadas
+
+    def _assinatura_arquivo(self):
+        try:
+            st = os.stat(self.caminho)
+            return st.st_ino, st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def _tamanho_journal(self) -> int:
+        try:
+            return os.path.getsize(self.journal)
+        except FileNotFoundError:
+            return 0
+
+    def _atualizado(self) -> bool:
+        return self._assinatura_arquivo() == self._assinatura and self._tamanho_journal() == self._offset
+
+    def _sincronizar(self):
+        """Traz para a memória o que outros processos gravaram (chamar com a trava)"""
+        assinatura = self._assinatura_arquivo()
+        if assinatura != self._assinatura:
+            documento = {}
+            if assinatura is not None:
+                try:
+                    with open(self.caminho, "r", encoding="utf-8") as f:
+                        documento = json.load(f)
+                except Exception:
+                    documento = {}
+            with self._lock:
+                self._por_dia = {int(d): v for d, v in documento.get("dias", {}).items()}
+                self._seq = documento.get("seq", 0)
+                self._offset = 0
+                self._linhas = 0
+                self._assinatura = assinatura
+        self._ler_journal()
+
+    def _ler_journal(self):
+        try:
+            with open(self.journal, "rb") as f:
+                f.seek(self._offset)
+                bloco = f.read()
+        except FileNotFoundError:
+            return
+        inicio = 0
+        with self._lock:
+            while inicio < len(bloco):
+                fim = bloco.find(b"\n", inicio)
+                if fim < 0:
+                    break  # linha ainda sem quebra: gravação interrompida
+                linha = bloco[inicio:fim]
+                inicio = fim + 1
+                try:
+                    seq, dia, *delta = json.loads(linha)
+                except ValueError:
+                    continue  # linha corrompida no meio do journal: ignorada
+                self._linhas += 1
+                # delta já incorporado ao snapshot: sobra de uma compactação interrompida
+                if seq <= self._seq:
+                    continue
+                self._somar(dia, delta)
+                self._seq = seq
+            self._offset += inicio
+        if inicio < len(bloco):
+            # última linha rasgada (processo morto no meio da escrita): descartar
+            with open(self.journal, "r+b") as f:
+                f.truncate(self._offset)
+
+    def _somar(self, dia, delta):
+        total = self._por_dia.setdefault(dia, [0, 0, 0])
+        for i, v in enumerate(delta):
+            total[i] += v
+
+    def _gravar_snapshot(self, por_dia, seq):
+        # snapshot primeiro (rename atômico), journal depois: se o processo morrer
+        # entre os dois passos, a releitura pula os deltas com seq <= o do snapshot
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        gravar_json(self.caminho, {"seq": seq, "dias": {str(d): v for d, v in sorted(por_dia.items())}})
+        with open(self.journal, "wb"):
+            pass
+        with self._lock:
+            self._por_dia, self._seq = por_dia, seq
+            self._offset = 0
+            self._linhas = 0
+            self._assinatura = self._assinatura_arquivo()
+
+    def _contadores(self):
+        """Contadores atuais; só toma a trava se outro processo alterou os arquivos"""
+        if not self._atualizado():
+            with self.trava.trava(TRAVA_AGREGADOS):
+                self._sincronizar()
+        return self._por_dia
+
+    def registrar(self, agendamento):
+        """Soma um agendamento confirmado aos contadores do seu dia"""
+        delta = contadores(agendamento)
+        with self.trava.trava(TRAVA_AGREGADOS):
+            self._sincronizar()
+            seq = self._seq + 1
+            linha = (json.dumps([seq, agendamento["dia"], *delta]) + "\n").encode("utf-8")
+            os.makedirs(os.path.dirname(self.journal) or ".", exist_ok=True)
+            with open(self.journal, "ab") as f:
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                self._somar(agendamento["dia"], delta)
+                self._seq = seq
+                self._offset += len(linha)
+                self._linhas += 1
+            if self.compactar_linhas and self._linhas >= self.compactar_linhas:
+                self._compactar()
+
+    def _compactar(self):
+        with self._lock:
+            por_dia = {d: list(v) for d, v in self._por_dia.items()}
+        self._gravar_snapshot(por_dia, self._seq)
+
+    def compactar(self) -> int:
+        """Incorpora o journal ao snapshot. Retorna quantas linhas foram incorporadas"""
+        with self.trava.trava(TRAVA_AGREGADOS):
+            self._sincronizar()
+            linhas = self._linhas
+            if linhas:
+                self._compactar()
+            return linhas
+
+    def dia(self, dia: int):
+        por_dia = self._contadores()
+        with self._lock:
+            return list(por_dia.get(dia, (0, 0, 0)))
+
+    def periodo(self, inicio: int, fim: int):
+        """Soma dos contadores de inicio a fim (ordinais, inclusive)"""
+        por_dia = self._contadores()
+        total = [0, 0, 0]
+        with self._lock:
+            for d in range(inicio, fim + 1):
+                for i, v in enumerate(por_dia.get(d, ())):
+                    total[i] += v
+        return total
+
+    def reconstruir(self, ler_agendamentos) -> int:
+        """Recalcula os contadores de todos os agendamentos; retorna quantos dias
+
+        `ler_agendamentos` lê o armazenamento e é chamada sob a trava: uma
+        reserva registrada entre uma leitura feita antes e a gravação do
+        snapshot teria o delta descartado junto com o journal.
+        """
+        with self.trava.trava(TRAVA_AGREGADOS):
+            self._sincronizar()
+            por_dia = calcular(ler_agendamentos())
+            self._gravar_snapshot(por_dia, self._seq)
+        return len(por_dia)
+
+    def verificar(self, agendamentos):
+        """[(dia, esperado, gravado)] dos dias divergentes; vazia se consistente"""
+        esperado = calcular(agendamentos)
+        atual = self._contadores()
+        divergencias = []
+        with self._lock:
+            for dia in sorted(set(esperado) | set(atual)):
+                e = esperado.get(dia, [0, 0, 0])
+                g = list(atual.get(dia, [0, 0, 0]))
+                if e != g:
+                    divergencias.append((dia, e, g))
+        return divergencias
+
+
+def capacidade_minutos(expediente, dia: int) -> int:
+    """Minutos de atendimento do dia somando todas as cadeiras"""
+    dia_semana = dia_da_semana(dia)
+    return sum(abertos[dia_semana].bit_count() for abertos in expediente.abertos) * expediente.passo
+
+
+def inicio_da_semana(dia: int) -> int:
+    """Segunda-feira da semana do dia (ordinal)"""
+    return dia - dia_da_semana(dia)
+
+
+USO = (
+    "Uso: python agregados.py reconstruir   (recalcula do armazenamento)\n"
+    "     python agregados.py verificar     (compara sem gravar)\n"
+    "     python agregados.py compactar     (incorpora o journal ao snapshot)"
+)
+
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) >= 2 else ""
+    if comando == "compactar":
+        print(f"{Agregados().compactar()} linha(s) incorporada(s)")
+        sys.exit(0)
+    if comando in ("reconstruir", "verificar"):
+        agregados = Agregados()
+        repositorio = get_repositorio()
+        if comando == "reconstruir":
+            print(f"{agregados.reconstruir(repositorio.listar)} dia(s) recalculado(s)")
+        divergencias = agregados.verificar(repositorio.listar())
+        for dia, esperado, gravado in divergencias:
+            print(f"dia {dia}: esperado {esperado}, gravado {gravado}")
+        print("agregados consistentes" if not divergencias else f"{len(divergencias)} dia(s) divergente(s)")
+        sys.exit(1 if divergencias else 0)
+    print(USO)
@@ -0,0 +1,10 @@
+# Modo web atrás de um servidor ASGI:  uvicorn asgi:app
+# Serve os assets com cache longo para as variantes de imagem (nomes com hash).
+# Com METRICAS=1 também responde /metrics (formato de texto do Prometheus).
+import flet.fastapi as flet_fastapi
+from imagens import ASSETS_DIR, aplicar_cache_longo, preparar_imagens
+from main import main
+from metricas import aplicar_endpoint_metricas
+
+preparar_imagens()
+app = aplicar_endpoint_metricas(aplicar_cache_longo(flet_fastapi.app(main, assets_dir=ASSETS_DIR)))
@@ -0,0 +1,194 @@
+"""Benchmark da camada de armazenamento e das consultas de agenda e usuários.
+
+Para cada backend e tamanho de histórico, gera users.json e agendamentos
+sintéticos (dados.py) numa pasta temporária e mede, num processo novo:
+load_agendamentos, load_agendamentos_ativos, construção do índice,
+get_horarios_disponiveis_dia, agendamentos_do_dia, find_user (cache
+quente e após o arquivo mudar), reservar_horario (o caminho do botão
+confirmar) e save_agendamentos.
+
+Uso (na pasta 2.0/):
+    python benchmarks/armazenamento.py
+    python benchmarks/armazenamento.py --tamanhos 1000,1000000 --backends sqlite,mensal
+    python benchmarks/armazenamento.py --salvar-linha-de-base
+
+Cada caso roda --rodadas vezes e fica a rodada de menor tempo mínimo. Os
+resultados vão para benchmarks/resultados/armazenamento.json e são
+comparados com benchmarks/linha_de_base/armazenamento.json, quando ela
+existe: tempo mínimo mais lento que a tolerância (e que PISO_MS) em algum
+caso termina com saída 1. Linhas de base gravadas antes do tempo mínimo
+não têm o que comparar: grave de novo.
+
+Tempos absolutos só se comparam na mesma máquina, então a linha de base é
+local e fica fora do git. Para avaliar uma mudança:
+    git stash    # ou checkout do commit de referência
+    python benchmarks/armazenamento.py --salvar-linha-de-base
+    git stash pop
+    python benchmarks/armazenamento.py
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date
+
+from comum import (
+    PASTA_BENCHMARKS,
+    PASTA_RESULTADOS,
+    RODADAS_PADRAO,
+    TOLERANCIA_PADRAO,
+    comparar,
+    gravar_resultados,
+    imprimir_tabela,
+    ler_resultados,
+    medir,
+    melhor_de,
+)
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+BACKENDS_PADRAO = ["json", "sqlite", "journal", "mensal"]
+
+RESULTADOS = os.path.join(PASTA_RESULTADOS, "armazenamento.json")
+LINHA_DE_BASE = os.path.join(PASTA_BENCHMARKS, "linha_de_base", "armazenamento.json")
+
+# Repetições de operações baratas (consultas em memória)
+REPETICOES_LEVES = 1000
+
+
+def repeticoes_pesadas(tamanho: int) -> int:
+    """Leituras e regravações completas: menos repetições quanto maior o histórico"""
+    return max(3, min(50, 200_000 // tamanho))
+
+
+def executar_caso(backend: str, tamanho: int):
+    """Mede um backend com um histórico de `tamanho` agendamentos (cwd = pasta temporária)"""
+    import agendamento
+    import login
+    from dados import DIAS_FUTUROS, VISITAS_POR_CLIENTE, gerar_agendamentos, gerar_usuarios, gravar_usuarios, nome_cliente
+    from disponibilidade import IndiceDisponibilidade
+    from repositorio import get_repositorio
+
+    hoje = date.today().toordinal()
+    clientes = max(1, tamanho // VISITAS_POR_CLIENTE)
+    gravar_usuarios(login.USERS_FILE, gerar_usuarios(clientes))
+    repositorio = get_repositorio()
+    historico = gerar_agendamentos(tamanho, agendamento.EXPEDIENTE, hoje)
+    repositorio.salvar_todos(historico)
+    # agregados do painel com o histórico inteiro, como em produção: sem isso
+    # reservar_horario mediria a soma sobre um arquivo de agregados vazio
+    agendamento.AGREGADOS.reconstruir(lambda: historico)
+
+    pesadas = repeticoes_pesadas(tamanho)
+    medias = min(REPETICOES_LEVES, pesadas * 4)
+    ativos = agendamento.load_agendamentos_ativos()
+    r = {}
+
+    r["load_agendamentos"] = medir(lambda i: agendamento.load_agendamentos(), pesadas)
+    r["load_agendamentos_ativos"] = medir(lambda i: agendamento.load_agendamentos_ativos(), pesadas)
+    r["construir_indice"] = medir(
+        lambda i: IndiceDisponibilidade(agendamento.EXPEDIENTE).construir(ativos), pesadas
+    )
+    agendamento.get_indice_disponibilidade()
+    r["get_horarios_disponiveis_dia"] = medir(
+        lambda i: agendamento.get_horarios_disponiveis_dia(hoje + i % DIAS_FUTUROS, 30), REPETICOES_LEVES
+    )
+    r["agendamentos_do_dia"] = medir(
+        lambda i: repositorio.agendamentos_do_dia(hoje + i % DIAS_FUTUROS), medias
+    )
+    r["find_user"] = medir(lambda i: login.find_user(nome_cliente(i % clientes)), REPETICOES_LEVES)
+
+    def find_user_recarga(i):
+        # outro processo gravou users.json: o cache relê o arquivo
+        os.utime(login.USERS_FILE, ns=(i + 1, i + 1))
+        login.find_user(nome_cliente(i % clientes))
+
+    r["find_user_recarga"] = medir(find_user_recarga, pesadas)
+
+    # reservas em dias ainda vazios, depois do fim do histórico gerado
+    vagas = agendamento.get_indice_disponibilidade().proximos(
+        hoje + DIAS_FUTUROS + 1, 30, medias + 2, cadeira=None
+    )
+
+    def reservar(i):
+        dia, minuto = vagas[i]
+        resultado = agendamento.reservar_horario({
+            "usuario": nome_cliente(i % clientes), "dia": dia, "minuto": minuto, "duracao": 30,
+            "servico": "Corte", "observacoes": "", "criado_em": 0,
+        })
+        assert resultado.ok, resultado.mensagem
+
+    r["reservar_horario"] = medir(reservar, medias)
+
+    todos = agendamento.load_agendamentos()
+    r["save_agendamentos"] = medir(lambda i: agendamento.save_agendamentos(todos), pesadas)
+    return {f"{backend}/{tamanho}/{operacao}": v for operacao, v in r.items()}
+
+
+def rodar_em_processo(backend: str, tamanho: int):
+    """Cada caso roda num processo e numa pasta próprios: caches e singletons limpos"""
+    pasta = tempfile.mkdtemp(prefix="bench_armazenamento_")
+    saida = os.path.join(pasta, "resultado.json")
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--caso", backend, str(tamanho), "--saida", saida],
+            cwd=pasta,
+            env={**os.environ, "AGENDAMENTOS_BACKEND": backend},
+            check=True,
+        )
+        with open(saida, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)))
+    parser.add_argument("--backends", default=",".join(BACKENDS_PADRAO))
+    parser.add_argument("--saida", default=RESULTADOS)
+    parser.add_argument("--linha-de-base", default=LINHA_DE_BASE)
+    parser.add_argument("--salvar-linha-de-base", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--rodadas", type=int, default=RODADAS_PADRAO)
+    parser.add_argument("--caso", nargs=2, metavar=("BACKEND", "TAMANHO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.caso:
+        backend, tamanho = args.caso[0], int(args.caso[1])
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(executar_caso(backend, tamanho), f)
+        return 0
+
+    rodadas = []
+    for rodada in range(1, args.rodadas + 1):
+        resultados = {}
+        for tamanho in (int(t) for t in args.tamanhos.split(",")):
+            for backend in args.backends.split(","):
+                print(f"-> rodada {rodada}: {backend} com {tamanho} agendamento(s)", flush=True)
+                resultados.update(rodar_em_processo(backend, tamanho))
+        rodadas.append(resultados)
+    resultados = melhor_de(rodadas)
+    imprimir_tabela(resultados)
+    gravar_resultados(args.saida, resultados)
+    print(f"resultados em {args.saida}")
+
+    if args.salvar_linha_de_base:
+        gravar_resultados(args.linha_de_base, resultados)
+        print(f"linha de base gravada em {args.linha_de_base}")
+        return 0
+    linha_de_base = ler_resultados(args.linha_de_base)
+    if linha_de_base is None:
+        print("sem linha de base para comparar (use --salvar-linha-de-base)")
+        return 0
+    regressoes = comparar(resultados, linha_de_base, args.tolerancia)
+    for caso, base, atual in regressoes:
+        print(f"REGRESSÃO {caso}: mínimo {base:.3f} ms -> {atual:.3f} ms")
+    print("sem regressões" if not regressoes else f"{len(regressoes)} regressão(ões)")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Gerador de carga: N sessões simuladas usando as views e handlers reais.
+
+Cada sessão (uma thread com sua PaginaFalsa) passa por main.main, faz
+login pelo botão "Entrar" da login_view (bcrypt de verdade, no pool de
+senhas), escolhe um serviço na servico_view e reserva pela
+agendamento_view: clica num dia e num horário livre e em "Confirmar
+Agendamento", ou usa "Próximo horário livre". As sessões disputam os
+mesmos poucos dias de propósito, para exercitar os conflitos.
+
+No fim confere o armazenamento contra o que as sessões viram:
+- perdidas: confirmadas na tela e ausentes do armazenamento;
+- fantasmas: gravadas sem nenhuma sessão ter visto a confirmação;
+- duplas: passos de uma mesma cadeira ocupados por mais de um agendamento.
+
+Uso (na pasta 2.0/):
+    python benchmarks/carga.py --sessoes 50 --reservas 4
+    AGENDAMENTOS_BACKEND=sqlite python benchmarks/carga.py --sessoes 200 --dias 2
+
+Relatório no terminal e em benchmarks/resultados/carga.json; saída 1 se
+houver reserva perdida, fantasma ou dupla.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import flet as ft
+from comum import PASTA_RESULTADOS, gravar_resultados, percentil
+from pagina_falsa import PaginaFalsa, clicar, procurar
+
+RESULTADOS = os.path.join(PASTA_RESULTADOS, "carga.json")
+
+SENHA = "senha-de-carga"
+
+# Fração das reservas feitas pelo atalho "Próximo horário livre" (as demais clicam no calendário)
+FRACAO_ATALHO = 0.3
+
+
+def nome_sessao(i: int) -> str:
+    return f"carga{i:05d}"
+
+
+class Sessao:
+    """Um cliente simulado: login, serviço e reservas pelas views reais"""
+
+    def __init__(self, numero: int, reservas: int, dias: int, semente: int):
+        self.usuario = nome_sessao(numero)
+        self.reservas = reservas
+        self.dias = dias
+        self.aleatorio = random.Random(semente + numero)
+        self.pagina = PaginaFalsa()
+        self.latencia_login = None
+        self.latencias_reserva = []
+        self.confirmadas = []  # (usuario, dia, minuto)
+        self.conflitos = 0
+        self.erros = []
+
+    def _aviso(self):
+        avisos = self.pagina.avisos()
+        return avisos[-1] if avisos else ""
+
+    def entrar(self):
+        import main
+
+        main.main(self.pagina)
+        self.pagina.go("/login")
+        view = self.pagina.view_atual()
+        campos = {c.label: c for c in procurar(view, lambda c: isinstance(c, ft.TextField))}
+        campos["Nome"].value = self.usuario
+        campos["Senha"].value = SENHA
+        botao = procurar(view, lambda c: getattr(c, "text", None) == "Entrar")[0]
+        inicio = time.perf_counter()
+        clicar(self.pagina, botao)
+        self.latencia_login = (time.perf_counter() - inicio) * 1000
+        if self.pagina.route != "/home":
+            raise RuntimeError(f"login falhou: {self._aviso()}")
+
+    def escolher_servico(self):
+        import servicos
+
+        self.pagina.go("/servico")
+        servico = self.aleatorio.choice(servicos.SERVICOS)["nome"]
+        botao = procurar(
+            self.pagina.view_atual(),
+            lambda c: (getattr(c, "text", None) or "").startswith(servico + "\n"),
+        )[0]
+        clicar(self.pagina, botao)
+
+    def _selecao(self, view):
+        """(dia, minuto) mostrados nos rótulos da view, ou None sem data e horário"""
+        rotulos = {}
+        for c in procurar(view, lambda c: isinstance(c, ft.Text) and isinstance(c.value, str)):
+            for prefixo in ("Data selecionada: ", "Horário selecionado: "):
+                if c.value.startswith(prefixo):
+                    rotulos[prefixo] = c.value[len(prefixo):]
+        try:
+            dia = datetime.strptime(rotulos["Data selecionada: "], "%d/%m/%Y").toordinal()
+            h, m = rotulos["Horário selecionado: "].split(":")
+        except (KeyError, ValueError):
+            return None
+        return dia, int(h) * 60 + int(m)
+
+    def _tentar_reserva(self, view):
+        """Uma tentativa: True se confirmou, False em conflito, None se não havia horário"""
+        if self.aleatorio.random() < FRACAO_ATALHO:
+            atalho = procurar(view, lambda c: getattr(c, "text", None) == "Próximo horário livre")[0]
+            clicar(self.pagina, atalho)
+        else:
+            dias = procurar(
+                view,
+                lambda c: isinstance(c.data, int) and c.data > 1440
+                and getattr(c, "on_click", None) and not c.disabled,
+            )[: self.dias]
+            if not dias:
+                return None
+            clicar(self.pagina, self.aleatorio.choice(dias))
+            livres = procurar(
+                view,
+                lambda c: isinstance(c.data, int) and c.data < 1440
+                and getattr(c, "on_click", None) and not c.disabled,
+            )
+            if not livres:
+                return None
+            clicar(self.pagina, self.aleatorio.choice(livres))
+        selecao = self._selecao(view)
+        if selecao is None:
+            return None
+        confirmar = procurar(view, lambda c: getattr(c, "text", None) == "Confirmar Agendamento")[0]
+        inicio = time.perf_counter()
+        clicar(self.pagina, confirmar)
+        self.latencias_reserva.append((time.perf_counter() - inicio) * 1000)
+        if self._aviso().startswith("Agendamento confirmado"):
+            self.confirmadas.append((self.usuario, *selecao))
+            return True
+        self.conflitos += 1
+        return False
+
+    def reservar(self):
+        """Escolhe um serviço e tenta até confirmar uma reserva (no máximo 10 vezes)"""
+        self.escolher_servico()
+        view = self.pagina.view_atual()
+        for _ in range(10):
+            if self._tentar_reserva(view):
+                return
+
+    def rodar(self, largada: threading.Barrier):
+        try:
+            largada.wait()
+            self.entrar()
+            for _ in range(self.reservas):
+                self.reservar()
+        except Exception as e:  # a sessão para, o relatório mostra o erro
+            self.erros.append(repr(e))
+        finally:
+            self.pagina.fechar()
+
+
+def conferir(agendamentos, confirmadas, expediente):
+    """(perdidas, fantasmas, duplas) comparando o armazenamento com o que as sessões viram"""
+    gravadas = {(a["usuario"], a["dia"], a["minuto"]) for a in agendamentos}
+    vistas = set(confirmadas)
+    ocupados = {}
+    duplas = 0
+    for a in agendamentos:
+        chave = (a["dia"], a.get("cadeira"))
+        bits = expediente.bits_ocupados(a["minuto"], a.get("duracao"))
+        if ocupados.get(chave, 0) & bits:
+            duplas += 1
+        ocupados[chave] = ocupados.get(chave, 0) | bits
+    return sorted(vistas - gravadas), sorted(gravadas - vistas), duplas
+
+
+def distribuicao(amostras):
+    return {
+        "n": len(amostras),
+        "p50_ms": round(percentil(amostras, 50), 3),
+        "p95_ms": round(percentil(amostras, 95), 3),
+        "p99_ms": round(percentil(amostras, 99), 3),
+        "max_ms": round(max(amostras), 3) if amostras else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--reservas", type=int, default=3, help="reservas por sessão")
+    parser.add_argument("--dias", type=int, default=3, help="dias disputados no calendário")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=RESULTADOS)
+    args = parser.parse_args()
+    saida = os.path.abspath(args.saida)
+
+    # storage/ é relativo à pasta atual: a carga roda numa pasta descartável
+    os.chdir(tempfile.mkdtemp(prefix="bench_carga_"))
+    import agendamento
+    import login
+    import pool_senhas
+
+    login.ensure_storage()
+    hash_senha = login.hash_password(SENHA)
+    login.save_users([{"username": nome_sessao(i), "password": hash_senha} for i in range(args.sessoes)])
+
+    sessoes = [Sessao(i, args.reservas, args.dias, args.semente) for i in range(args.sessoes)]
+    largada = threading.Barrier(args.sessoes + 1)
+    threads = [threading.Thread(target=s.rodar, args=(largada,), daemon=True) for s in sessoes]
+    for t in threads:
+        t.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for t in threads:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+
+    confirmadas = [c for s in sessoes for c in s.confirmadas]
+    perdidas, fantasmas, duplas = conferir(agendamento.load_agendamentos(), confirmadas, agendamento.EXPEDIENTE)
+    erros = [e for s in sessoes for e in s.erros]
+    relatorio = {
+        "backend": os.getenv("AGENDAMENTOS_BACKEND", "json"),
+        "sessoes": args.sessoes,
+        "reservas_por_sessao": args.reservas,
+        "decorrido_s": round(decorrido, 3),
+        "confirmadas": len(confirmadas),
+        "conflitos": sum(s.conflitos for s in sessoes),
+        "reservas_por_s": round(len(confirmadas) / decorrido, 2) if decorrido else 0.0,
+        "login": distribuicao([s.latencia_login for s in sessoes if s.latencia_login is not None]),
+        "confirmar": distribuicao([t for s in sessoes for t in s.latencias_reserva]),
+        "perdidas": len(perdidas),
+        "fantasmas": len(fantasmas),
+        "duplas": duplas,
+        "pico_memoria_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "pool_senhas": pool_senhas.pool.estatisticas(),
+        "erros": erros[:10],
+    }
+
+    print(f"{relatorio['sessoes']} sessões, {relatorio['confirmadas']} reservas em {relatorio['decorrido_s']} s "
+          f"({relatorio['reservas_por_s']}/s), {relatorio['conflitos']} conflito(s)")
+    for nome in ("login", "confirmar"):
+        d = relatorio[nome]
+        print(f"{nome:10} p50 {d['p50_ms']:.1f} ms  p95 {d['p95_ms']:.1f} ms  p99 {d['p99_ms']:.1f} ms  max {d['max_ms']:.1f} ms")
+    print(f"perdidas {relatorio['perdidas']}  fantasmas {relatorio['fantasmas']}  duplas {relatorio['duplas']}  "
+          f"pico de memória {relatorio['pico_memoria_kib'] / 1024:.1f} MiB")
+    for e in relatorio["erros"]:
+        print(f"erro: {e}")
+    gravar_resultados(saida, relatorio)
+    print(f"relatório em {saida}")
+    return 1 if perdidas or fantasmas or duplas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Medição, resultados e comparação com a linha de base, comuns aos benchmarks"""
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# Pasta do app (2.0/): os benchmarks importam os módulos dele diretamente
+RAIZ_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ_APP not in sys.path:
+    sys.path.insert(0, RAIZ_APP)
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+PASTA_RESULTADOS = os.path.join(PASTA_BENCHMARKS, "resultados")
+
+# Piora aceita no tempo mínimo antes de acusar regressão (1.0 = duas vezes
+# mais lento). Entre execuções sem mudança de código, na mesma máquina, o
+# mínimo de um caso chegou a variar 1,9x; o p50, mais ainda. O que o
+# benchmark precisa pegar são mudanças de complexidade (ex.: regravar o
+# arquivo inteiro a cada reserva), que ficam muito acima disso.
+TOLERANCIA_PADRAO = 1.0
+
+# Abaixo disto (ms) a diferença é ruído de medição, não regressão
+PISO_MS = 0.5
+
+# Rodadas de cada caso (processos novos); vale a de menor tempo mínimo
+RODADAS_PADRAO = 3
+
+
+def bytes_escritos():
+    """Bytes passados a write() pelo processo até agora (None fora do Linux)"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            for linha in f:
+                if linha.startswith("wchar:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def percentil(amostras, p: float) -> float:
+    ordenadas = sorted(amostras)
+    if not ordenadas:
+        return 0.0
+    i = min(len(ordenadas) - 1, max(0, round(p / 100 * (len(ordenadas) - 1))))
+    return ordenadas[i]
+
+
+def medir(funcao, repeticoes: int, aquecimento: int = 1):
+    """Executa `funcao(i)` e devolve mínimo/p50/p95 (ms), pico de memória e bytes escritos por chamada.
+
+    Os tempos saem de execuções sem tracemalloc (que deixaria tudo mais
+    lento); o pico de alocação vem de uma execução extra, rastreada.
+    `i` é o número da chamada, para operações que precisam de argumentos
+    distintos (ex.: um horário diferente por reserva).
+    """
+    for i in range(aquecimento):
+        funcao(i)
+    inicio_io = bytes_escritos()
+    tempos = []
+    for i in range(aquecimento, aquecimento + repeticoes):
+        t = time.perf_counter()
+        funcao(i)
+        tempos.append((time.perf_counter() - t) * 1000)
+    fim_io = bytes_escritos()
+
+    tracemalloc.start()
+    try:
+        funcao(aquecimento + repeticoes)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "repeticoes": repeticoes,
+        "min_ms": round(min(tempos), 4),
+        "p50_ms": round(percentil(tempos, 50), 4),
+        "p95_ms": round(percentil(tempos, 95), 4),
+        "pico_alocado_bytes": pico,
+        "bytes_escritos": None if inicio_io is None else (fim_io - inicio_io) // repeticoes,
+    }
+
+
+def melhor_de(rodadas):
+    """Junta os resultados de várias rodadas ficando, por caso, com a de menor tempo mínimo"""
+    melhores = {}
+    for resultados in rodadas:
+        for caso, r in resultados.items():
+            if caso not in melhores or r["min_ms"] < melhores[caso]["min_ms"]:
+                melhores[caso] = r
+    return melhores
+
+
+def metadados():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpu": platform.processor() or platform.machine(),
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def gravar_resultados(caminho, resultados):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadados(), "resultados": resultados}, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def ler_resultados(caminho):
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f).get("resultados", {})
+    except FileNotFoundError:
+        return None
+
+
+def comparar(atuais, linha_de_base, tolerancia: float = TOLERANCIA_PADRAO):
+    """[(caso, mínimo da base, mínimo atual)] dos casos que ficaram mais lentos que a tolerância
+
+    O mínimo das repetições é o tempo menos afetado pelo resto da máquina
+    (o ruído só deixa uma execução mais lenta).
+    """
+    regressoes = []
+    for caso, atual in sorted(atuais.items()):
+        base = linha_de_base.get(caso)
+        if not base or "min_ms" not in base or "min_ms" not in atual:
+            continue
+        if atual["min_ms"] - base["min_ms"] > max(PISO_MS, base["min_ms"] * tolerancia):
+            regressoes.append((caso, base["min_ms"], atual["min_ms"]))
+    return regressoes
+
+
+def imprimir_tabela(resultados):
+    print(f"{'caso':48} {'min ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'pico KiB':>10} {'escrito B':>12}")
+    for caso, r in sorted(resultados.items()):
+        escrito = "-" if r.get("bytes_escritos") is None else r["bytes_escritos"]
+        print(f"{caso:48} {r['min_ms']:>10.3f} {r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} "
+              f"{r['pico_alocado_bytes'] / 1024:>10.1f} {escrito:>12}")
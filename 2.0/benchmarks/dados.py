@@ -0,0 +1,72 @@
+"""Históricos sintéticos da barbearia: users.json e agendamentos em qualquer backend"""
+import json
+import os
+import random
+
+import comum  # noqa: F401  (coloca a pasta do app no sys.path)
+from servicos import SERVICOS
+
+# Fração dos inícios livres que recebem um agendamento (dias movimentados, não lotados)
+OCUPACAO = 0.6
+
+# Visitas médias por cliente ao longo do histórico
+VISITAS_POR_CLIENTE = 20
+
+# Dias futuros com agenda aberta; o resto do histórico fica no passado
+DIAS_FUTUROS = 60
+
+# Hash no formato do bcrypt: os benchmarks medem busca, não verificação de senha
+HASH_FICTICIO = "$2b$12$" + "a" * 53
+
+
+def nome_cliente(i: int) -> str:
+    return f"cliente{i:07d}"
+
+
+def gerar_usuarios(quantidade: int):
+    return [{"username": "admin", "password": HASH_FICTICIO}] + [
+        {"username": nome_cliente(i), "password": HASH_FICTICIO} for i in range(quantidade)
+    ]
+
+
+def gerar_agendamentos(quantidade: int, expediente, hoje: int, semente: int = 42):
+    """`quantidade` agendamentos sem sobreposição, cadeira a cadeira, terminando DIAS_FUTUROS à frente.
+
+    Cada dia é preenchido como uma agenda real: percorre os inícios que
+    ainda cabem o serviço sorteado em cada cadeira e ocupa ~OCUPACAO deles.
+    """
+    aleatorio = random.Random(semente)
+    clientes = max(1, quantidade // VISITAS_POR_CLIENTE)
+    agendamentos = []
+    dia = hoje + DIAS_FUTUROS
+    while len(agendamentos) < quantidade:
+        dia_semana = (dia + 6) % 7
+        for pos, cadeira in enumerate(expediente.cadeiras):
+            ocupado = 0
+            for i, minuto in enumerate(expediente.minutos):
+                servico = aleatorio.choice(SERVICOS)
+                inicios = expediente.inicios_possiveis(dia_semana, ocupado, servico["duracao"], pos)
+                if not inicios >> i & 1 or aleatorio.random() > OCUPACAO:
+                    continue
+                ocupado |= expediente.bits_ocupados(minuto, servico["duracao"])
+                agendamentos.append({
+                    "usuario": nome_cliente(aleatorio.randrange(clientes)),
+                    "dia": dia,
+                    "minuto": minuto,
+                    "duracao": servico["duracao"],
+                    "cadeira": cadeira,
+                    "servico": servico["nome"],
+                    "observacoes": "",
+                    "criado_em": 1_700_000_000 + len(agendamentos),
+                })
+                if len(agendamentos) >= quantidade:
+                    return agendamentos
+        dia -= 1
+    return agendamentos
+
+
+def gravar_usuarios(caminho, usuarios):
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"users": usuarios}, f, ensure_ascii=False)
+
@@ -0,0 +1,281 @@
+"""ft.Page falsa para rodar as views reais sem navegador nem servidor Flet.
+
+Implementa só o que o app usa da página: session, client_storage,
+overlay, views, route, go/update, on_route_change/on_view_pop, pubsub e
+window. update() liga cada control da árvore à página (como o Flet faz ao
+enviar a árvore ao cliente), para que control.update() funcione nos
+handlers. Eventos são disparados com disparar(), que também roda handlers
+assíncronos no event loop da sessão.
+
+PaginaGravadora faz o update como o Flet: calcula a diferença da árvore
+com o próprio build_update_commands dos controls e serializa o lote como
+o servidor web o enviaria pelo websocket, registrando o tamanho.
+"""
+import asyncio
+import inspect
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import comum  # noqa: F401  (coloca a pasta do app no sys.path)
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.page import Offstage
+from flet.core.protocol import ClientActions, ClientMessage, CommandEncoder
+
+
+class _Armazenamento:
+    """page.session / page.client_storage: get/set/remove/contains_key"""
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            return self._dados.get(chave)
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = valor
+
+    def remove(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def contains_key(self, chave) -> bool:
+        with self._lock:
+            return chave in self._dados
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+
+class CentralPubSub:
+    """Pub/sub do processo, compartilhado por todas as páginas falsas.
+
+    Como no Flet, handlers síncronos rodam num executor: quem publica não
+    espera as outras sessões processarem o evento.
+    """
+
+    def __init__(self, trabalhadores: int = 4):
+        self._lock = threading.Lock()
+        self._assinantes = {}  # tópico -> {sessão: handler}
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="pubsub")
+
+    def assinar(self, sessao, topico, handler):
+        with self._lock:
+            self._assinantes.setdefault(topico, {})[sessao] = handler
+
+    def cancelar(self, sessao, topico):
+        with self._lock:
+            self._assinantes.get(topico, {}).pop(sessao, None)
+
+    def enviar(self, topico, mensagem):
+        with self._lock:
+            handlers = list(self._assinantes.get(topico, {}).values())
+        for handler in handlers:
+            self._executor.submit(handler, topico, mensagem)
+
+
+CENTRAL_PUBSUB = CentralPubSub()
+
+
+class _PubSubDaPagina:
+    def __init__(self, sessao, central):
+        self._sessao = sessao
+        self._central = central
+
+    def subscribe_topic(self, topico, handler):
+        self._central.assinar(self._sessao, topico, handler)
+
+    def unsubscribe_topic(self, topico):
+        self._central.cancelar(self._sessao, topico)
+
+    def send_all_on_topic(self, topico, mensagem):
+        self._central.enviar(topico, mensagem)
+
+
+class _Janela:
+    width = None
+    height = None
+
+
+class _Evento:
+    def __init__(self, control, data=None):
+        self.control = control
+        self.data = data
+        self.page = control.page if control is not None else None
+
+
+class PaginaFalsa:
+    def __init__(self, central=CENTRAL_PUBSUB):
+        self.session_id = uuid.uuid4().hex
+        self.session = _Armazenamento()
+        self.client_storage = _Armazenamento()
+        self.pubsub = _PubSubDaPagina(self.session_id, central)
+        self.overlay = []
+        self.views = []
+        self.controls = []
+        self.route = "/"
+        self.window = _Janela()
+        self.title = ""
+        self.bgcolor = None
+        self.padding = None
+        self.horizontal_alignment = None
+        self.vertical_alignment = None
+        self.on_route_change = None
+        self.on_view_pop = None
+        self.atualizacoes = 0
+        self._loop = None
+
+    # ---------- API da página usada pelo app ----------
+    def go(self, rota):
+        self.route = rota
+        if self.on_route_change:
+            self.on_route_change(None)
+
+    def update(self, *controls):
+        self.atualizacoes += 1
+        for raiz in list(self.views) + list(self.overlay):
+            for control in percorrer(raiz):
+                control.page = self
+
+    def _clean(self, control):
+        pass
+
+    def run_thread(self, funcao, *args):
+        funcao(*args)
+
+    def run_task(self, funcao, *args):
+        return self.loop().run_until_complete(funcao(*args))
+
+    # ---------- apoio ao harness ----------
+    def loop(self):
+        """Event loop desta sessão (handlers async rodam nele, na thread que disparou)"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def fechar(self):
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    def view_atual(self):
+        return self.views[-1] if self.views else None
+
+    def avisos(self):
+        """Textos das snackbars abertas, da mais antiga à mais recente"""
+        return [s.content.value for s in self.overlay if isinstance(s, ft.SnackBar)]
+
+
+class _ConexaoGravadora(LocalConnection):
+    """Transforma comandos em mensagens ao cliente como o servidor web do Flet"""
+
+    def __init__(self):
+        super().__init__()
+        self.mensagens = []  # texto JSON de cada lote enviado
+
+    def enviar(self, comandos):
+        """Processa os comandos do update; retorna (ids dos adicionados, bytes enviados)"""
+        resultados, mensagens = [], []
+        for comando in comandos:
+            resultado, mensagem = self._process_command(comando)
+            if comando.name == "add":
+                resultados.append(resultado)
+            if mensagem:
+                mensagens.append(mensagem)
+        if not mensagens:
+            return resultados, 0
+        texto = json.dumps(
+            ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, mensagens), cls=CommandEncoder, separators=(",", ":")
+        )
+        self.mensagens.append(texto)
+        return resultados, len(texto.encode("utf-8"))
+
+
+class _RaizPagina(ft.Control):
+    """O control "page" do cliente: views mais o offstage (overlay)"""
+
+    def __init__(self, pagina):
+        super().__init__()
+        self._Control__uid = "page"
+        self.pagina = pagina
+        self.offstage = Offstage()
+
+    def _get_control_name(self):
+        return "page"
+
+    def _get_children(self):
+        return list(self.pagina.views) + [self.offstage]
+
+
+class PaginaGravadora(PaginaFalsa):
+    """PaginaFalsa cujo update() gera e mede o lote real enviado ao cliente"""
+
+    def __init__(self, central=CENTRAL_PUBSUB):
+        super().__init__(central)
+        self._raiz = _RaizPagina(self)
+        self.overlay = self._raiz.offstage.controls
+        self._indice = {"page": self}
+        self._conexao = _ConexaoGravadora()
+        self._lock_update = threading.Lock()
+        self.bytes_enviados = 0
+        self.lotes = 0
+
+    def update(self, *controls):
+        with self._lock_update:
+            self.atualizacoes += 1
+            for atributo in ("route", "title", "bgcolor", "padding"):
+                valor = getattr(self, atributo)
+                if isinstance(valor, (str, int, float)):
+                    self._raiz._set_attr(atributo, valor)
+            comandos, adicionados, removidos = [], [], []
+            for control in controls or (self._raiz,):
+                control.build_update_commands(self._indice, comandos, adicionados, removidos)
+            resultados, tamanho = self._conexao.enviar(comandos)
+            # ids atribuídos pelo "cliente", na ordem dos controls adicionados
+            ids = [i for linha in resultados for i in linha.split(" ") if i]
+            for control, uid in zip(adicionados, ids):
+                control._Control__uid = uid
+                self._indice[uid] = control
+            self.bytes_enviados += tamanho
+            self.lotes += 1 if tamanho else 0
+        for control in removidos:
+            control.will_unmount()
+            control.parent = None
+            control.page = None
+        for control in adicionados:
+            control.did_mount()
+
+    def contar_controls(self):
+        """Controls presentes na árvore enviada ao cliente (sem contar a raiz)"""
+        return sum(1 for _ in percorrer(self._raiz)) - 1
+
+
+def percorrer(control):
+    """O control e todos os descendentes (em profundidade)"""
+    pilha = [control]
+    while pilha:
+        atual = pilha.pop()
+        yield atual
+        pilha.extend(reversed(atual._get_children()))
+
+
+def procurar(raiz, condicao):
+    return [c for c in percorrer(raiz) if condicao(c)]
+
+
+def disparar(pagina, handler, control=None, data=None):
+    """Chama um handler como o Flet faria (async no loop da sessão)"""
+    resultado = handler(_Evento(control, data))
+    if inspect.iscoroutine(resultado):
+        return pagina.loop().run_until_complete(resultado)
+    return resultado
+
+
+def clicar(pagina, control):
+    return disparar(pagina, control.on_click, control)
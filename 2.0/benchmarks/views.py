@@ -0,0 +1,167 @@
+"""Tamanho das árvores de controls e dos updates enviados ao cliente, por view.
+
+Sobe uma PaginaGravadora, passa por main.main e navega pelas rotas com o
+route_change real; para cada cenário (render inicial de cada view e
+interações representativas: clique num dia, num horário, troca de
+barbeiro, de mês, atalho de próximo horário, volta a uma view em cache)
+mede quantos controls a árvore tem e quantos bytes o lote do update
+ocupa no websocket.
+
+Uso (na pasta 2.0/):
+    python benchmarks/views.py
+    python benchmarks/views.py --atualizar-orcamento
+
+Falha (saída 1) quando algum número passa do orçamento versionado em
+benchmarks/orcamento_views.json. --atualizar-orcamento regrava o
+orçamento com os valores atuais mais FOLGA, para quando o aumento é
+intencional.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+
+from comum import PASTA_BENCHMARKS, PASTA_RESULTADOS, gravar_resultados
+from pagina_falsa import PaginaGravadora, clicar, disparar, procurar
+
+ORCAMENTO = os.path.join(PASTA_BENCHMARKS, "orcamento_views.json")
+RESULTADOS = os.path.join(PASTA_RESULTADOS, "views.json")
+
+# Margem sobre o medido ao regravar o orçamento: o mês exibido e a data de
+# hoje mudam um pouco os tamanhos de um dia para o outro
+FOLGA = 0.10
+
+USUARIO = "cliente"
+
+
+def _dia_livre(c):
+    return isinstance(c.data, int) and c.data > 1440 and getattr(c, "on_click", None) and not c.disabled
+
+
+def _horario_livre(c):
+    return isinstance(c.data, int) and c.data < 1440 and getattr(c, "on_click", None) and not c.disabled
+
+
+def _texto(texto):
+    return lambda c: getattr(c, "text", None) == texto
+
+
+def cenarios(pagina):
+    """[(nome, ação)] na ordem em que um cliente navegaria"""
+    import main
+
+    def agendamento():
+        return pagina.view_atual()
+
+    def entrar():
+        pagina.session.set("user", USUARIO)
+        pagina.go("/home")
+
+    def trocar_barbeiro():
+        dropdown = procurar(agendamento(), lambda c: c.__class__.__name__ == "Dropdown")[0]
+        dropdown.value = "2"
+        disparar(pagina, dropdown.on_change, dropdown)
+
+    def mes_seguinte():
+        botao = procurar(
+            agendamento(), lambda c: getattr(c, "icon", None) == "chevron_right" and not c.disabled
+        )[0]
+        clicar(pagina, botao)
+
+    def voltar_agendamento():
+        pagina.go("/home")
+        pagina.go("/agendamento")
+
+    def admin():
+        pagina.session.set("user", "admin")
+        pagina.session.set("admin", True)  # como o do_login faz após conferir a senha
+        pagina.go("/admin")
+
+    return [
+        ("first", lambda: main.main(pagina)),
+        ("login", lambda: pagina.go("/login")),
+        ("home", entrar),
+        ("servico", lambda: pagina.go("/servico")),
+        ("agendamento", lambda: pagina.go("/agendamento")),
+        ("agendamento/clique_data", lambda: clicar(pagina, procurar(agendamento(), _dia_livre)[0])),
+        ("agendamento/clique_horario", lambda: clicar(pagina, procurar(agendamento(), _horario_livre)[0])),
+        ("agendamento/barbeiro", trocar_barbeiro),
+        ("agendamento/proximo_livre", lambda: clicar(pagina, procurar(agendamento(), _texto("Próximo horário livre"))[0])),
+        ("agendamento/mes_seguinte", mes_seguinte),
+        ("agendamento/reexibir", voltar_agendamento),
+        ("meus_agendamentos", lambda: pagina.go("/meus-agendamentos")),
+        ("admin", admin),
+    ]
+
+
+def medir_views():
+    pagina = PaginaGravadora()
+    resultados = {}
+    for nome, acao in cenarios(pagina):
+        antes_bytes, antes_lotes = pagina.bytes_enviados, pagina.lotes
+        acao()
+        resultados[nome] = {
+            "controls": pagina.contar_controls(),
+            "bytes": pagina.bytes_enviados - antes_bytes,
+            "lotes": pagina.lotes - antes_lotes,
+        }
+    return resultados
+
+
+def estouros(resultados, orcamento):
+    """[(cenário, métrica, limite, medido)] acima do orçamento (cenário sem orçamento não falha)"""
+    acima = []
+    for nome, medidas in sorted(resultados.items()):
+        limites = orcamento.get(nome, {})
+        for metrica in ("controls", "bytes"):
+            if metrica in limites and medidas[metrica] > limites[metrica]:
+                acima.append((nome, metrica, limites[metrica], medidas[metrica]))
+    return acima
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orcamento", default=ORCAMENTO)
+    parser.add_argument("--atualizar-orcamento", action="store_true")
+    parser.add_argument("--saida", default=RESULTADOS)
+    args = parser.parse_args()
+    orcamento_path = os.path.abspath(args.orcamento)
+    saida = os.path.abspath(args.saida)
+
+    # storage/ é relativo à pasta atual: as views rodam sobre um armazenamento vazio
+    os.chdir(tempfile.mkdtemp(prefix="bench_views_"))
+    resultados = medir_views()
+
+    print(f"{'cenário':32} {'controls':>9} {'bytes':>9} {'lotes':>6}")
+    for nome, m in resultados.items():
+        print(f"{nome:32} {m['controls']:>9} {m['bytes']:>9} {m['lotes']:>6}")
+    gravar_resultados(saida, resultados)
+
+    if args.atualizar_orcamento:
+        orcamento = {
+            nome: {metrica: math.ceil(m[metrica] * (1 + FOLGA)) for metrica in ("controls", "bytes")}
+            for nome, m in resultados.items()
+        }
+        with open(orcamento_path, "w", encoding="utf-8") as f:
+            json.dump(orcamento, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"orçamento gravado em {orcamento_path}")
+        return 0
+
+    try:
+        with open(orcamento_path, "r", encoding="utf-8") as f:
+            orcamento = json.load(f)
+    except FileNotFoundError:
+        print(f"sem orçamento em {orcamento_path} (use --atualizar-orcamento)")
+        return 1
+    acima = estouros(resultados, orcamento)
+    for nome, metrica, limite, medido in acima:
+        print(f"ACIMA DO ORÇAMENTO {nome}: {metrica} {medido} > {limite}")
+    print("dentro do orçamento" if not acima else f"{len(acima)} estouro(s)")
+    return 1 if acima else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import flet as ft
+from collections import OrderedDict
+
+# Quantidade máxima de views guardadas por sessão
+LIMITE_VIEWS = 5
+
+# Chave da sessão onde fica o cache de views
+CHAVE_SESSAO = "cache_views"
+
+
+class CacheViews:
+    """Views já construídas de uma sessão, reaproveitadas por rota (descarte LRU).
+
+    Ao reexibir uma view guardada, chama o gancho registrado com
+    ao_reexibir() para atualizar só as partes dinâmicas (saudação,
+    serviço selecionado, etc.) em vez de reconstruir a árvore inteira.
+    Ao descartar uma view (LRU ou invalidar), chama o gancho de
+    ao_descartar() para ela soltar o que mantém vivo fora da árvore
+    (assinaturas do pubsub, timers).
+    """
+
+    def __init__(self, limite: int = LIMITE_VIEWS):
+        self.limite = limite
+        self._views = OrderedDict()
+
+    def obter(self, rota: str, construir) -> ft.View:
+        view = self._views.get(rota)
+        if view is None:
+            view = construir()
+            self._views[rota] = view
+            while len(self._views) > self.limite:
+                _, descartada = self._views.popitem(last=False)
+                _chamar_gancho(descartada, "ao_descartar")
+        else:
+            self._views.move_to_end(rota)
+            _chamar_gancho(view, "ao_reexibir")
+        return view
+
+    def invalidar(self, rota: str | None = None):
+        """Descarta a view da rota (ou todas, se rota for None)"""
+        if rota is None:
+            descartadas = list(self._views.values())
+            self._views.clear()
+        else:
+            descartadas = [v for v in (self._views.pop(rota, None),) if v is not None]
+        for view in descartadas:
+            _chamar_gancho(view, "ao_descartar")
+
+    def __contains__(self, rota):
+        return rota in self._views
+
+
+def _chamar_gancho(view: ft.View, chave: str):
+    for control in view.controls:
+        if isinstance(control.data, dict) and control.data.get(chave):
+            control.data[chave]()
+
+
+def ao_reexibir(control: ft.Control, gancho):
+    """Registra a função chamada quando a view deste control for reaproveitada"""
+    if not isinstance(control.data, dict):
+        control.data = {}
+    control.data["ao_reexibir"] = gancho
+    return control
+
+
+def ao_descartar(control: ft.Control, gancho):
+    """Registra a função chamada quando a view deste control sair do cache"""
+    if not isinstance(control.data, dict):
+        control.data = {}
+    control.data["ao_descartar"] = gancho
+    return control
+
+
+def cache_da_sessao(page: ft.Page) -> CacheViews:
+    cache = page.session.get(CHAVE_SESSAO)
+    if cache is None:
+        cache = CacheViews()
+        page.session.set(CHAVE_SESSAO, cache)
+    return cache
+
+
+def invalidar_views(page: ft.Page, rota: str | None = None):
+    """Gancho de invalidação para as views (ex.: logout descarta tudo)"""
+    cache_da_sessao(page).invalidar(rota)
@@ -0,0 +1,37 @@
+from datetime import date
+from functools import lru_cache
+
+# Grade fixa: 6 semanas x 7 dias (segunda a domingo) cobre qualquer mês
+SEMANAS = 6
+CELULAS = SEMANAS * 7
+
+
+@lru_cache(maxsize=48)
+def grade_mes(ano: int, mes: int):
+    """Modelo do mês, calculado uma vez: tupla de CELULAS posições.
+
+    Cada posição é None (fora do mês) ou (dia do mês, ordinal da data).
+    A posição i corresponde à semana i // 7 e ao dia da semana i % 7.
+    """
+    primeiro = date(ano, mes, 1)
+    inicio = primeiro.weekday()  # 0=segunda, 6=domingo
+    proximo = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    ultimo_dia = (proximo - primeiro).days
+    base = primeiro.toordinal()
+    celulas = [None] * CELULAS
+    for dia in range(1, ultimo_dia + 1):
+        celulas[inicio + dia - 1] = (dia, base + dia - 1)
+    return tuple(celulas)
+
+
+@lru_cache(maxsize=48)
+def semanas_usadas(ano: int, mes: int) -> int:
+    """Quantas linhas da grade o mês ocupa (4 a 6)"""
+    celulas = grade_mes(ano, mes)
+    ultima = max(i for i, c in enumerate(celulas) if c is not None)
+    return ultima // 7 + 1
+
+
+def somar_meses(ano: int, mes: int, delta: int):
+    total = ano * 12 + (mes - 1) + delta
+    return total // 12, total % 12 + 1
@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import time
+from metricas import contar_bytes, cronometrar, registrar_coletor
+
+
+class EscritorDuravel:
+    """Gravação atômica (temporário + fsync + rename), um arquivo por vez.
+
+    Sem janela de agrupamento: os chamadores gravam sob a própria trava de
+    leitura-alteração-gravação, então nunca há duas versões do mesmo
+    arquivo esperando. A trava por arquivo protege o temporário, que tem o
+    mesmo nome para todas as threads do processo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._travas_arquivo = {}  # caminho -> lock da gravação física
+        self._gravacoes = 0
+        self._segundos = 0.0
+
+    def gravar_json(self, caminho, dados):
+        with self._lock:
+            trava = self._travas_arquivo.setdefault(caminho, threading.Lock())
+        with trava:
+            inicio = time.perf_counter()
+            _gravar_atomico(caminho, dados)
+            decorrido = time.perf_counter() - inicio
+        with self._lock:
+            self._gravacoes += 1
+            self._segundos += decorrido
+
+    def estatisticas(self) -> dict:
+        """Gravações feitas e tempo total gasto nelas (temporário, fsync e rename)"""
+        with self._lock:
+            return {"gravacoes": self._gravacoes, "segundos": self._segundos}
+
+    def metricas(self):
+        e = self.estatisticas()
+        return [
+            ("barbearia_gravacoes_total", e["gravacoes"], {}),
+            ("barbearia_gravacoes_segundos_total", e["segundos"], {}),
+        ]
+
+
+@cronometrar("barbearia_escrita_segundos")
+def _gravar_atomico(caminho, dados):
+    diretorio = os.path.dirname(caminho) or "."
+    os.makedirs(diretorio, exist_ok=True)
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+        contar_bytes(f, "escrita")
+    os.replace(tmp, caminho)
+    if os.name == "posix":
+        # garante que o rename em si sobreviva a uma queda de energia
+        fd = os.open(diretorio, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+# Escritor compartilhado por login.py e pelos repositórios de agendamentos
+escritor = EscritorDuravel()
+registrar_coletor(escritor.metricas)
+
+
+def gravar_json(caminho, dados):
+    escritor.gravar_json(caminho, dados)
+
+
+def estatisticas() -> dict:
+    return escritor.estatisticas()
@@ -0,0 +1,68 @@
+import threading
+
+# Eventos de horário publicados no page.pubsub do Flet (compartilhado por todas
+# as sessões do processo). Um tópico por dia; mensagem compacta (evento, minuto).
+OCUPADO = "ocupado"
+LIVRE = "livre"
+
+# Janela (s) para juntar eventos recebidos em um único page.update() por sessão
+JANELA_COALESCENCIA = 0.1
+
+
+def topico(dia: int) -> str:
+    return f"agenda:{dia}"
+
+
+def publicar_ocupado(page, dia: int, minuto: int):
+    page.pubsub.send_all_on_topic(topico(dia), (OCUPADO, minuto))
+
+
+def publicar_livre(page, dia: int, minuto: int):
+    page.pubsub.send_all_on_topic(topico(dia), (LIVRE, minuto))
+
+
+class AssinaturaAgenda:
+    """Assina os eventos do dia exibido por uma view e os entrega em lotes.
+
+    aplicar(eventos) recebe a lista de (evento, minuto) acumulada na janela
+    e altera os controls; em seguida é feito um único page.update().
+    """
+
+    def __init__(self, page, aplicar, janela: float = JANELA_COALESCENCIA):
+        self.page = page
+        self.aplicar = aplicar
+        self.janela = janela
+        self.dia = None
+        self._lock = threading.Lock()
+        self._pendentes = []
+        self._timer = None
+
+    def seguir(self, dia):
+        """Passa a acompanhar só o dia informado (None cancela a assinatura)"""
+        if dia == self.dia:
+            return
+        if self.dia is not None:
+            self.page.pubsub.unsubscribe_topic(topico(self.dia))
+        with self._lock:
+            self._pendentes = []
+        self.dia = dia
+        if dia is not None:
+            self.page.pubsub.subscribe_topic(topico(dia), self._receber)
+
+    def _receber(self, topic, mensagem):
+        with self._lock:
+            if self.dia is None or topic != topico(self.dia):
+                return  # evento de um dia que a view já deixou de exibir
+            self._pendentes.append(mensagem)
+            if self._timer is None:
+                self._timer = threading.Timer(self.janela, self._descarregar)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _descarregar(self):
+        with self._lock:
+            eventos, self._pendentes = self._pendentes, []
+            self._timer = None
+        if eventos:
+            self.aplicar(eventos)
+            self.page.update()
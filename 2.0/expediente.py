@@ -0,0 +1,113 @@
+# Granularidade da agenda (minutos): todo início de serviço cai num múltiplo disto
+PASSO_MIN = 30
+
+# Turnos de atendimento por dia da semana (0=segunda ... 6=domingo).
+# O intervalo entre turnos é a pausa do almoço: 12:00 ainda recebe um
+# serviço de 30 min, mas nada atravessa 12:30-13:00.
+TURNOS_PADRAO = [("09:00", "12:30"), ("13:00", "17:30")]
+EXPEDIENTE_SEMANAL = {dia: TURNOS_PADRAO for dia in range(7)}
+
+
+def para_minutos(horario: str) -> int:
+    h, m = horario.split(":")
+    return int(h) * 60 + int(m)
+
+
+def para_horario(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def dia_da_semana(dia: int) -> int:
+    """Dia da semana (0=segunda) de um ordinal de data, sem criar date"""
+    return (dia + 6) % 7
+
+
+class Expediente:
+    """Grade de horários derivada dos turnos das cadeiras, com máscaras de bits pré-calculadas.
+
+    Cada início possível (em qualquer cadeira e dia da semana) recebe um bit,
+    na ordem de `minutos` (minuto do dia). Para uma cadeira em um dia, "quais inícios
+    comportam k passos" é a interseção de k deslocamentos da máscara livre
+    com a máscara de continuidade de k passos: O(k) operações de bits, sem
+    percorrer a lista.
+
+    cadeiras: [{"id": 1, "nome": "...", "turnos": {dia_semana: [(abre, fecha), ...]}}]
+    ("turnos" é opcional; sem ele vale EXPEDIENTE_SEMANAL). Sem lista, uma
+    única cadeira com o expediente padrão.
+    """
+
+    def __init__(self, cadeiras=None, passo: int = PASSO_MIN):
+        cadeiras = cadeiras or [{"id": 1, "nome": "Cadeira 1"}]
+        self.passo = passo
+        self.cadeiras = [c["id"] for c in cadeiras]
+        self.nomes = {c["id"]: c.get("nome") or f"Cadeira {c['id']}" for c in cadeiras}
+        self._posicao_cadeira = {c: i for i, c in enumerate(self.cadeiras)}
+
+        inicios = []  # por cadeira: {dia_semana: set(minutos)}
+        todos = set()
+        for c in cadeiras:
+            semanal = c.get("turnos") or EXPEDIENTE_SEMANAL
+            por_dia = {}
+            for dia in range(7):
+                minutos = set()
+                for abre, fecha in semanal.get(dia, []):
+                    m = para_minutos(abre)
+                    while m + passo <= para_minutos(fecha):
+                        minutos.add(m)
+                        m += passo
+                por_dia[dia] = minutos
+                todos |= minutos
+            inicios.append(por_dia)
+        self.minutos = sorted(todos)
+        self._posicao = {m: i for i, m in enumerate(self.minutos)}
+        # bits dos inícios dentro do expediente de cada cadeira, por dia da semana
+        self.abertos = [
+            [sum(1 << i for i, m in enumerate(self.minutos) if m in por_dia[dia]) for dia in range(7)]
+            for por_dia in inicios
+        ]
+        self._continuos = {}
+
+    def posicao_cadeira(self, cadeira):
+        """Posição da cadeira nas listas de máscaras (None se não existir)"""
+        return self._posicao_cadeira.get(cadeira)
+
+    def passos(self, duracao: int) -> int:
+        return max(1, -(-int(duracao or self.passo) // self.passo))
+
+    def bit(self, minuto: int) -> int:
+        pos = self._posicao.get(minuto)
+        return 0 if pos is None else 1 << pos
+
+    def bits_ocupados(self, minuto: int, duracao: int) -> int:
+        """Bits de todos os passos cobertos por um serviço que começa no minuto"""
+        pos = self._posicao.get(minuto)
+        if pos is None:
+            return 0
+        mascara = 0
+        for j in range(self.passos(duracao)):
+            if pos + j < len(self.minutos) and self.minutos[pos + j] == self.minutos[pos] + j * self.passo:
+                mascara |= 1 << (pos + j)
+        return mascara
+
+    def continuo(self, k: int) -> int:
+        """Bits i em que os passos i..i+k-1 são consecutivos no relógio (sem pausa)"""
+        mascara = self._continuos.get(k)
+        if mascara is None:
+            mascara = 0
+            for i, m in enumerate(self.minutos):
+                if i + k <= len(self.minutos) and self.minutos[i + k - 1] == m + (k - 1) * self.passo:
+                    mascara |= 1 << i
+            self._continuos[k] = mascara
+        return mascara
+
+    def inicios_possiveis(self, dia_semana: int, ocupado: int, duracao: int, posicao: int = 0) -> int:
+        """Máscara dos inícios em que um serviço de `duracao` cabe na cadeira (posição) no dia"""
+        livre = self.abertos[posicao][dia_semana] & ~ocupado
+        k = self.passos(duracao)
+        cabe = livre & self.continuo(k)
+        for j in range(1, k):
+            cabe &= livre >> j
+        return cabe
+
+    def minutos_da_mascara(self, mascara: int):
+        return [m for i, m in enumerate(self.minutos) if mascara >> i & 1]
@@ -1,4 +1,5 @@
 import flet as ft
+from imagens import src_imagem
 
 #tamanho geral da pagina
 def first_view(page: ft.Page) -> ft.Column:
@@ -37,7 +38,7 @@ def first_view(page: ft.Page) -> ft.Column:
     container = ft.Stack(
         controls=[
             ##background
-            ft.Image(src='2.0/pageinicial.png', width=320, height=480, fit=ft.ImageFit.COVER),
+            ft.Image(src=src_imagem("pageinicial.png", 320), width=320, height=480, fit=ft.ImageFit.COVER),
             ft.Container(
                 #margens e borda dentro do container
                 width= 220,
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import threading
+
+# Redimensionamento de imagens (opcional: sem Pillow as views usam os originais)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Pasta de assets do Flet (padrão de ft.app) e cache das variantes geradas
+ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+PASTA_CACHE = "img_cache"
+CACHE_DIR = os.path.join(ASSETS_DIR, PASTA_CACHE)
+
+# Imagens usadas pelas views: nome do arquivo -> src original (fallback)
+IMAGENS = {
+    "pageinicial.png": "2.0/pageinicial.png",
+    "hometitulo.png": "2.0/hometitulo.png",
+}
+
+# Larguras geradas (px); a view escolhe a menor que cubra largura * DPR
+LARGURAS = (160, 320, 480, 640, 960, 1280)
+DPR = float(os.getenv("IMAGENS_DPR", "2"))
+# Formato preferido ("webp" ou "jpg"); imagens com transparência ficam sempre em webp
+FORMATO = os.getenv("IMAGENS_FORMATO", "webp")
+QUALIDADE_WEBP = 80
+QUALIDADE_JPEG = 82
+
+# Variantes levam o hash do conteúdo no nome, então podem ficar em cache para sempre
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_variantes = {}  # nome -> [(largura, {formato: src}), ...] em ordem crescente
+_lock = threading.Lock()
+_preparado = False
+
+
+def _hash_arquivo(caminho) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloco)
+    return h.hexdigest()[:12]
+
+
+def gerar_variantes(nome: str, larguras=LARGURAS):
+    """Gera as variantes redimensionadas de uma imagem (só as que ainda não existem).
+
+    WebP sempre; JPEG também quando a imagem não tem transparência.
+    Retorna [(largura, {formato: src}), ...] com src relativo à pasta de assets.
+    """
+    origem = os.path.join(BASE_DIR, nome)
+    if Image is None or not os.path.exists(origem):
+        return []
+    base, _ = os.path.splitext(nome)
+    digest = _hash_arquivo(origem)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    variantes = []
+    with Image.open(origem) as im:
+        tem_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if tem_alpha else "RGB")
+        # nunca ampliar: a maior variante é a largura original
+        alvo = sorted({min(w, im.width) for w in larguras})
+        for largura in alvo:
+            altura = max(1, round(im.height * largura / im.width))
+            formatos = [("webp", {"quality": QUALIDADE_WEBP, "method": 6})]
+            if not tem_alpha:
+                formatos.append(("jpg", {"quality": QUALIDADE_JPEG, "optimize": True, "progressive": True}))
+            redimensionada = None
+            srcs = {}
+            for ext, opcoes in formatos:
+                arquivo = f"{base}-{digest}-{largura}w.{ext}"
+                destino = os.path.join(CACHE_DIR, arquivo)
+                if not os.path.exists(destino):
+                    if redimensionada is None:
+                        redimensionada = im.resize((largura, altura), Image.LANCZOS)
+                    tmp = f"{destino}.{os.getpid()}.tmp"
+                    redimensionada.save(tmp, format="WEBP" if ext == "webp" else "JPEG", **opcoes)
+                    os.replace(tmp, destino)
+                srcs[ext] = f"/{PASTA_CACHE}/{arquivo}"
+            variantes.append((largura, srcs))
+    return variantes
+
+
+def preparar_imagens():
+    """Gera/indexa as variantes de todas as imagens das views (uma vez por processo)"""
+    global _preparado
+    if _preparado:
+        return
+    with _lock:
+        if _preparado:
+            return
+        for nome in IMAGENS:
+            try:
+                _variantes[nome] = gerar_variantes(nome)
+            except Exception:
+                _variantes[nome] = []  # imagem ilegível: usa o original
+        _preparado = True
+
+
+def src_imagem(nome: str, largura) -> str:
+    """src da menor variante que cobre a largura exibida na densidade DPR"""
+    variantes = _variantes.get(nome)
+    if not variantes:
+        return IMAGENS.get(nome, nome)
+    necessario = (largura or 0) * DPR
+    escolhida = variantes[-1][1]
+    for w, srcs in variantes:
+        if w >= necessario:
+            escolhida = srcs
+            break
+    return escolhida.get(FORMATO) or escolhida["webp"]
+
+
+def aplicar_cache_longo(app):
+    """Middleware FastAPI: cabeçalho de cache longo para as variantes (modo web)"""
+    prefixo = f"/{PASTA_CACHE}/"
+
+    @app.middleware("http")
+    async def cache_longo(request, call_next):
+        resposta = await call_next(request)
+        if request.url.path.startswith(prefixo) and resposta.status_code == 200:
+            resposta.headers["Cache-Control"] = CACHE_CONTROL
+        return resposta
+
+    return app
+
+
+if __name__ == "__main__":
+    # Uso (build): python imagens.py  -> gera as variantes em assets/img_cache
+    if Image is None:
+        print("Pillow não instalado. Execute: pip install pillow")
+    else:
+        preparar_imagens()
+        for nome, variantes in _variantes.items():
+            print(nome, ", ".join(src for _, srcs in variantes for src in srcs.values()) or "(sem variantes)")
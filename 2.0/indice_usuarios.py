@@ -0,0 +1,55 @@
+import threading
+from bisect import insort
+
+from registros import chave_ordem
+
+
+def _chave_recente(a):
+    # mais recentes primeiro: (dia, minuto) decrescentes
+    dia, minuto, cadeira = chave_ordem(a)
+    return -dia, -minuto, cadeira
+
+
+def _chave_usuario(usuario) -> str:
+    # o login não diferencia maiúsculas: "Joao" e "joao" são o mesmo cliente
+    return (usuario or "").casefold()
+
+
+class IndiceUsuarios:
+    """Agendamentos de cada usuário, ordenados do mais recente para o mais antigo
+
+    Índice secundário sobre o armazenamento: a tela "Meus agendamentos" lê
+    páginas daqui em vez de filtrar todos os agendamentos a cada visita.
+    As reservas do processo entram por inserção ordenada; `assinatura`
+    guarda a do armazenamento lido na construção, para refazer o índice
+    quando outro processo gravar (ver agendamento.get_indice_usuarios).
+    """
+
+    def __init__(self):
+        self._por_usuario = {}  # usuario (casefold) -> lista ordenada por _chave_recente
+        self._lock = threading.Lock()
+        self.assinatura = None
+
+    def construir(self, agendamentos, assinatura=None):
+        """Recria o índice a partir da lista completa de agendamentos"""
+        por_usuario = {}
+        for a in agendamentos:
+            por_usuario.setdefault(_chave_usuario(a.get("usuario")), []).append(a)
+        for lista in por_usuario.values():
+            lista.sort(key=_chave_recente)
+        with self._lock:
+            self._por_usuario = por_usuario
+            self.assinatura = assinatura
+
+    def adicionar(self, agendamento):
+        with self._lock:
+            lista = self._por_usuario.setdefault(_chave_usuario(agendamento.get("usuario")), [])
+            insort(lista, agendamento, key=_chave_recente)
+
+    def total(self, usuario) -> int:
+        return len(self._por_usuario.get(_chave_usuario(usuario), ()))
+
+    def pagina(self, usuario, inicio: int = 0, tamanho: int = 20):
+        """Fatia [inicio, inicio+tamanho) dos agendamentos do usuário (mais recentes primeiro)"""
+        with self._lock:
+            return list(self._por_usuario.get(_chave_usuario(usuario), ())[inicio:inicio + tamanho])
@@ -1,6 +1,13 @@
 import flet as ft
 import os
 import json
+import threading
+import time
+from escrita_duravel import gravar_json
+import pool_senhas
+from pool_senhas import FilaCheia
+from cache_views import ao_reexibir
+from metricas import contar_bytes, cronometrar, medir, observar
 
 # Segurança de senhas
 try:
@@ -14,6 +21,22 @@ Colors = ft.Colors
 DATA_DIR = "storage"
 USERS_FILE = os.path.join(DATA_DIR, "users.json")
 
+# Conta criada por seed_admin: a única com acesso ao painel (/admin)
+ADMIN_USUARIO = "admin"
+
+# Custo do bcrypt: o maior que caiba no orçamento de latência deste servidor.
+# BCRYPT_CUSTO fixa o valor e pula a calibração.
+BCRYPT_ORCAMENTO_MS = float(os.getenv("BCRYPT_ORCAMENTO_MS", "250"))
+BCRYPT_CUSTO_MIN = 10
+BCRYPT_CUSTO_MAX = 14
+BCRYPT_CUSTO_PADRAO = 12  # padrão do bcrypt.gensalt(), usado até a calibração
+
+_custo_bcrypt = int(os.getenv("BCRYPT_CUSTO")) if os.getenv("BCRYPT_CUSTO") else None
+_calibracao_lock = threading.Lock()
+
+# Serializa ler-alterar-gravar de users.json (cadastro, seed e rehash)
+_escrita_usuarios = threading.Lock()
+
 
 def ensure_storage():
     os.makedirs(DATA_DIR, exist_ok=True)
@@ -22,56 +45,191 @@ def ensure_storage():
             json.dump({"users": []}, f, indent=2, ensure_ascii=False)
 
 
+# --------------------------
+# Cache de usuários do processo
+# --------------------------
+class _CacheUsuarios:
+    """Usuários em memória, indexados pelo nome em casefold.
+
+    Recarrega o arquivo só quando mtime ou tamanho mudam (outro processo
+    gravou) e é atualizado diretamente por save_users.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = []
+        self._por_nome = {}
+        self._assinatura = None
+
+    @staticmethod
+    def _assinatura_arquivo():
+        try:
+            st = os.stat(USERS_FILE)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _indexar(self, users, assinatura):
+        por_nome = {}
+        for u in users:
+            # em nomes repetidos vale o primeiro, como na busca linear
+            por_nome.setdefault(u.get("username", "").casefold(), u)
+        self._users = users
+        self._por_nome = por_nome
+        self._assinatura = assinatura
+
+    def _sincronizar(self):
+        assinatura = self._assinatura_arquivo()
+        if assinatura is not None and assinatura == self._assinatura:
+            return
+        with self._lock:
+            assinatura = self._assinatura_arquivo()
+            if assinatura is not None and assinatura == self._assinatura:
+                return
+            ensure_storage()
+            try:
+                with open(USERS_FILE, "r", encoding="utf-8") as f:
+                    contar_bytes(f, "leitura")
+                    users = json.load(f).get("users", [])
+            except Exception:
+                users = []
+            self._indexar(users, self._assinatura_arquivo())
+
+    def usuarios(self):
+        self._sincronizar()
+        return list(self._users)
+
+    def buscar(self, username: str):
+        self._sincronizar()
+        return self._por_nome.get(username.casefold())
+
+    def atualizar(self, users):
+        with self._lock:
+            self._indexar(list(users), self._assinatura_arquivo())
+
+
+_cache_usuarios = _CacheUsuarios()
+
+
+@cronometrar("barbearia_armazenamento_segundos", operacao="load_users")
 def load_users():
-    ensure_storage()
-    try:
-        with open(USERS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            return data.get("users", [])
-    except Exception:
-        return []
+    return _cache_usuarios.usuarios()
 
 
+@cronometrar("barbearia_armazenamento_segundos", operacao="save_users")
 def save_users(users):
     ensure_storage()
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"users": users}, f, indent=2, ensure_ascii=False)
+    gravar_json(USERS_FILE, {"users": users})
+    _cache_usuarios.atualizar(users)
 
 
 def find_user(username: str, users=None):
     if users is None:
-        users = load_users()
+        return _cache_usuarios.buscar(username)
     for u in users:
-        if u.get("username", "").lower() == username.lower():
+        if u.get("username", "").casefold() == username.casefold():
             return u
     return None
 
 
+def calibrar_custo_bcrypt(orcamento_ms: float = BCRYPT_ORCAMENTO_MS,
+                          minimo: int = BCRYPT_CUSTO_MIN, maximo: int = BCRYPT_CUSTO_MAX) -> int:
+    # Mede o custo mínimo e extrapola: cada +1 no custo dobra o tempo do hash.
+    # Roda uma vez por processo; chamadas seguintes devolvem o valor já escolhido.
+    global _custo_bcrypt
+    if _custo_bcrypt is not None:
+        return _custo_bcrypt
+    with _calibracao_lock:
+        if _custo_bcrypt is not None:
+            return _custo_bcrypt
+        if bcrypt is None:
+            _custo_bcrypt = BCRYPT_CUSTO_PADRAO
+            return _custo_bcrypt
+        salt = bcrypt.gensalt(rounds=minimo)
+        medidas = []
+        for _ in range(2):
+            inicio = time.perf_counter()
+            bcrypt.hashpw(b"calibracao", salt)
+            medidas.append((time.perf_counter() - inicio) * 1000)
+        base_ms = min(medidas)
+        custo = minimo
+        while custo < maximo and base_ms * 2 ** (custo + 1 - minimo) <= orcamento_ms:
+            custo += 1
+        _custo_bcrypt = custo
+    return _custo_bcrypt
+
+
+def custo_bcrypt() -> int:
+    return _custo_bcrypt if _custo_bcrypt is not None else BCRYPT_CUSTO_PADRAO
+
+
+def custo_do_hash(stored: str) -> int | None:
+    # formato "$2b$12$<salt+hash>"
+    partes = stored.split("$")
+    if len(partes) >= 4 and partes[2].isdigit():
+        return int(partes[2])
+    return None
+
+
+@cronometrar("barbearia_bcrypt_segundos", operacao="hash")
 def hash_password(plain: str) -> str:
     if bcrypt is None:
         return f"PLAINTEXT::{plain}"
-    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt(rounds=custo_bcrypt())).decode("utf-8")
 
 
-def check_password(plain: str, stored: str) -> bool:
+def check_password(plain: str, stored: str, user=None) -> bool:
+    # user: registro do usuário; se informado e o custo do hash salvo for
+    # diferente do alvo, a senha é refeita e persistida após o login válido
     if bcrypt is None:
         return stored == f"PLAINTEXT::{plain}"
     try:
-        return bcrypt.checkpw(plain.encode("utf-8"), stored.encode("utf-8"))
+        with medir("barbearia_bcrypt_segundos", operacao="verificar"):
+            ok = bcrypt.checkpw(plain.encode("utf-8"), stored.encode("utf-8"))
     except Exception:
         return False
+    if ok and user is not None and custo_do_hash(stored) != custo_bcrypt():
+        _rehash(user.get("username", ""), plain, stored)
+    return ok
+
+
+def _rehash(username: str, plain: str, stored: str):
+    novo = hash_password(plain)
+    with _escrita_usuarios:
+        users = load_users()
+        for i, u in enumerate(users):
+            # só troca se ninguém alterou a senha nesse meio tempo
+            if u.get("username", "").casefold() == username.casefold() and u.get("password") == stored:
+                users[i] = {**u, "password": novo}
+                save_users(users)
+                return
 
 
 def seed_admin(default_password: str = "admin"):
-    users = load_users()
-    if find_user("admin", users) is None:
-        users.append(
-            {
-                "username": "admin",
-                "password": hash_password(default_password),
-            }
-        )
-        save_users(users)
+    with _escrita_usuarios:
+        if find_user(ADMIN_USUARIO) is None:
+            users = load_users()
+            users.append(
+                {
+                    "username": ADMIN_USUARIO,
+                    "password": hash_password(default_password),
+                }
+            )
+            save_users(users)
+
+
+def eh_admin(usuario) -> bool:
+    return usuario == ADMIN_USUARIO
+
+
+# Chave da sessão (no servidor) que marca o login de administrador. Só o
+# do_login a define, depois de conferir a senha; o client_storage fica no
+# navegador e pode ser editado, então nunca serve para autorizar.
+SESSAO_ADMIN = "admin"
+
+
+def sessao_admin(page: ft.Page) -> bool:
+    return page.session.get(SESSAO_ADMIN) is True
 
 
 def snackbar(page: ft.Page, msg: str, *, bg=Colors.BLUE_GREY_900, color=Colors.WHITE):
@@ -100,6 +258,24 @@ def build_mobile_card(content: ft.Control, width: int | None = None) -> ft.Conta
     )
 
 
+def set_botao_carregando(page: ft.Page, botao: ft.ElevatedButton, texto: str | None):
+    # texto: rótulo exibido ao lado do indicador de progresso; None restaura o botão
+    if texto is None:
+        botao.content = None
+        botao.disabled = False
+    else:
+        botao.content = ft.Row(
+            controls=[
+                ft.ProgressRing(width=16, height=16, stroke_width=2, color=Colors.WHITE),
+                ft.Text(texto, color=Colors.WHITE),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+            tight=True,
+        )
+        botao.disabled = True
+    page.update()
+
+
 # ---------- VIEWS ----------
 def login_view(page: ft.Page) -> ft.Column:
     page.bgcolor = "#546b7b"  # fundo da página
@@ -145,23 +321,44 @@ def login_view(page: ft.Page) -> ft.Column:
         bgcolor=Colors.WHITE
     )
 
-    # Função de login
-    def do_login(_=None):
+    # Função de login (bcrypt roda no pool de senhas, fora do event loop)
+    em_andamento = {"value": False}
+
+    async def do_login(_=None):
+        if em_andamento["value"]:
+            return
         u = (username.value or "").strip()
         p = password.value or ""
         if not u or not p:
             snackbar(page, "Informe usuário e senha.", bg=Colors.RED_400)
             return
-        user = find_user(u)
-        if user and check_password(p, user.get("password", "")):
-            # Salva login na sessão e no armazenamento local
+        em_andamento["value"] = True
+        inicio = time.perf_counter()
+        set_botao_carregando(page, login_btn, "Entrando...")
+        try:
+            user = find_user(u)
+            ok = user is not None and await pool_senhas.executar(check_password, p, user.get("password", ""), user)
+        except FilaCheia:
+            snackbar(page, "Muitos acessos no momento. Tente novamente.", bg=Colors.AMBER_600)
+            observar("barbearia_login_segundos", time.perf_counter() - inicio, resultado="fila_cheia")
+            return
+        finally:
+            em_andamento["value"] = False
+            set_botao_carregando(page, login_btn, None)
+        if ok:
+            # Salva login na sessão e no armazenamento local, com o nome como
+            # foi cadastrado (o login não diferencia maiúsculas)
+            u = user["username"]
             page.session.set("user", u)
             page.client_storage.set("logged_user", u)
+            page.session.set(SESSAO_ADMIN, eh_admin(u))
             snackbar(page, "Login realizado com sucesso!", bg=Colors.GREEN_500)
-            page.go("/home")
+            page.go("/admin" if sessao_admin(page) else "/home")
             page.update()
+            observar("barbearia_login_segundos", time.perf_counter() - inicio, resultado="ok")
             return
         snackbar(page, "Usuário ou senha inválidos.", bg=Colors.RED_400)
+        observar("barbearia_login_segundos", time.perf_counter() - inicio, resultado="falha")
 
 
     username.on_submit = do_login
@@ -236,7 +433,11 @@ def login_view(page: ft.Page) -> ft.Column:
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
     )
 
-    return root
+    # Reaproveitada do cache: não manter a senha digitada anteriormente
+    def reexibir():
+        password.value = ""
+
+    return ao_reexibir(root, reexibir)
 
 def cadastro_view(page: ft.Page) -> ft.Column:
     page.bgcolor = "#546b7b"  # fundo da página, igual ao login
@@ -288,8 +489,12 @@ def cadastro_view(page: ft.Page) -> ft.Column:
         bgcolor=Colors.WHITE
     )
 
-    # Função de cadastro
-    def do_register(_=None):
+    # Função de cadastro (hash no pool de senhas, fora do event loop)
+    em_andamento = {"value": False}
+
+    async def do_register(_=None):
+        if em_andamento["value"]:
+            return
         u = (user_new.value or "").strip()
         p1 = pass_new.value or ""
         p2 = pass_conf.value or ""
@@ -300,13 +505,31 @@ def cadastro_view(page: ft.Page) -> ft.Column:
         if p1 != p2:
             snackbar(page, "As senhas não conferem.", bg=Colors.RED_400)
             return
-        users = load_users()
-        if find_user(u, users) is not None:
+        if find_user(u) is not None:
             snackbar(page, "Usuário já existe.", bg=Colors.RED_400)
             return
 
-        users.append({"username": u, "password": hash_password(p1)})
-        save_users(users)
+        em_andamento["value"] = True
+        set_botao_carregando(page, register_btn, "Cadastrando...")
+        try:
+            senha_hash = await pool_senhas.executar(hash_password, p1)
+        except FilaCheia:
+            snackbar(page, "Muitos acessos no momento. Tente novamente.", bg=Colors.AMBER_600)
+            return
+        finally:
+            em_andamento["value"] = False
+            set_botao_carregando(page, register_btn, None)
+
+        with _escrita_usuarios:
+            # outro cadastro com o mesmo nome pode ter terminado durante o hash
+            existe = find_user(u) is not None
+            if not existe:
+                users = load_users()
+                users.append({"username": u, "password": senha_hash})
+                save_users(users)
+        if existe:
+            snackbar(page, "Usuário já existe.", bg=Colors.RED_400)
+            return
         snackbar(page, "Cadastro realizado! Faça login.", bg=Colors.GREEN_500)
         page.go("/login")
         page.update()
@@ -386,7 +609,13 @@ def cadastro_view(page: ft.Page) -> ft.Column:
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
     )
 
-    return root
+    # Reaproveitada do cache: formulário limpo
+    def reexibir():
+        user_new.value = ""
+        pass_new.value = ""
+        pass_conf.value = ""
+
+    return ao_reexibir(root, reexibir)
 
 def home_view(page: ft.Page) -> ft.Column:
     user = page.session.get("user") or "usuário"
@@ -407,7 +636,7 @@ def home_view(page: ft.Page) -> ft.Column:
 
     logout_btn = ft.ElevatedButton(
         "Sair",
-        on_click=lambda _: (page.session.remove("user"), page.go("/login"), page.update()),
+        on_click=lambda _: (page.session.remove("user"), page.session.remove(SESSAO_ADMIN), page.go("/login"), page.update()),
         style=ft.ButtonStyle(
             bgcolor=Colors.RED_500,
             color=Colors.WHITE,
@@ -1,17 +1,40 @@
 import flet as ft
 import os
 from home import first_view
-from login import login_view, cadastro_view, home_view, ensure_storage, seed_admin, snackbar, Colors, bcrypt
+from login import login_view, cadastro_view, home_view, ensure_storage, seed_admin, snackbar, Colors, bcrypt, calibrar_custo_bcrypt, sessao_admin
 from Mainhome import home_view as main_home_view
-from agendamento import agendamento_view
+from agendamento import agendamento_view, get_indice_disponibilidade, iniciar_verificacao_indice, preparar_agregados
 from servicos import servico_view
+from meus_agendamentos import meus_agendamentos_view
+from painel_admin import painel_admin_view
+from cache_views import cache_da_sessao
+from imagens import ASSETS_DIR, preparar_imagens
+from metricas import contar, iniciar_exportacao, medir
+from perfil import instrumentar_pagina, perfilar
 
 def main(page: ft.Page):
     page.title = "Tiozão Barbearia"
     
     # Inicialização de storage e admin
     ensure_storage()
+    # Custo do bcrypt calibrado para este servidor (só na primeira sessão)
+    calibrar_custo_bcrypt()
     seed_admin()
+    # Índice de horários ocupados (construído só na primeira sessão do processo)
+    get_indice_disponibilidade()
+    # Conferência periódica do índice com o armazenamento (uma thread por processo)
+    iniciar_verificacao_indice()
+    # Agregados do painel do administrador (calculados só se ainda não existirem)
+    preparar_agregados()
+    # Endpoint /metrics e log periódico (só com METRICAS=1; uma vez por processo)
+    iniciar_exportacao()
+    contar("barbearia_sessoes_total")
+    contar("barbearia_sessoes_ativas")
+
+    def sessao_encerrada(_):
+        contar("barbearia_sessoes_ativas", -1)
+
+    page.on_close = sessao_encerrada
 
     # --------------------------
     # Função para verificar login
@@ -26,32 +49,45 @@ def main(page: ft.Page):
     # --------------------------
     # Função que atualiza a view quando a rota muda
     # --------------------------
+    # Rota -> (cor de fundo, função que constrói a view)
+    rotas = {
+        "/first": (Colors.BLUE_GREY_900, first_view),
+        "/login": (Colors.BLUE_GREY_50, login_view),
+        "/cadastro": (Colors.BLUE_GREY_100, cadastro_view),
+        "/home": (Colors.WHITE, main_home_view),
+        "/agendamento": (Colors.BLUE_GREY_900, agendamento_view),
+        "/servico": (Colors.BLUE_GREY_900, servico_view),
+        "/meus-agendamentos": (Colors.BLUE_GREY_900, meus_agendamentos_view),
+        "/admin": (Colors.BLUE_GREY_900, painel_admin_view),
+    }
+
+    # Rotas restritas ao administrador (autorizado pela sessão, ver sessao_admin)
+    rotas_admin = {"/admin"}
+
+    # Views já construídas nesta sessão (reaproveitadas ao voltar para a rota)
+    cache = cache_da_sessao(page)
+
     def route_change(_):
-        page.views.clear()
         route = page.route or "/first"
-
-        if route == "/first":
-            page.bgcolor = Colors.BLUE_GREY_900
-            page.views.append(ft.View("/first", controls=[first_view(page)], bgcolor=page.bgcolor))
-        elif route == "/login":
-            page.bgcolor = Colors.BLUE_GREY_50
-            page.views.append(ft.View("/login", controls=[login_view(page)], bgcolor=page.bgcolor))
-        elif route == "/cadastro":
-            page.bgcolor = Colors.BLUE_GREY_100
-            page.views.append(ft.View("/cadastro", controls=[cadastro_view(page)], bgcolor=page.bgcolor))
-        elif route == "/home":
-            page.bgcolor = Colors.WHITE
-            page.views.append(ft.View("/home", controls=[main_home_view(page)], bgcolor=page.bgcolor))
-        elif route == "/agendamento":
-            page.bgcolor = Colors.BLUE_GREY_900
-            page.views.append(ft.View("/agendamento", controls=[agendamento_view(page)], bgcolor=page.bgcolor))
-        elif route == "/servico":
-            page.bgcolor = Colors.BLUE_GREY_900
-            page.views.append(ft.View("/servico", controls=[servico_view(page)], bgcolor=page.bgcolor))
-        else:
+        if route not in rotas:
             page.go("/first")
             return
-        page.update()
+        if route in rotas_admin and not sessao_admin(page):
+            page.go("/home")
+            return
+        with perfilar("rota", route), medir("barbearia_rota_segundos", rota=route):
+            bgcolor, construir_view = rotas[route]
+            page.bgcolor = bgcolor
+
+            def construir():
+                with medir("barbearia_view_construcao_segundos", rota=route):
+                    return ft.View(route, controls=[construir_view(page)], bgcolor=page.bgcolor)
+
+            view = cache.obter(route, construir)
+            page.bgcolor = view.bgcolor
+            page.views.clear()
+            page.views.append(view)
+            page.update()
 
     # --------------------------
     # Função que trata o "voltar"
@@ -72,6 +108,8 @@ def main(page: ft.Page):
     # --------------------------
     page.on_route_change = route_change
     page.on_view_pop = view_pop
+    # PROFILE=...: perfila os handlers de eventos da sessão (ver perfil.py)
+    instrumentar_pagina(page)
 
     # --------------------------
     # Aviso caso bcrypt não esteja instalado
@@ -102,9 +140,14 @@ def main(page: ft.Page):
         return
 
     if is_logged_in():
-        page.go("/home")
+        # login lembrado pelo navegador vale só para o cliente: o painel pede
+        # um novo login de administrador nesta sessão
+        page.go("/admin" if sessao_admin(page) else "/home")
     else:
         page.go("/first")
 
 if __name__ == "__main__":
-    ft.app(target=main)
+    # Variantes redimensionadas das imagens, geradas antes de subir o app (só as
+    # que ainda não existem): dentro de main() a primeira sessão esperava por elas
+    preparar_imagens()
+    ft.app(target=main, assets_dir=ASSETS_DIR)
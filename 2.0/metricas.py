@@ -0,0 +1,297 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# METRICAS=1 liga a coleta. Desligada (padrão), cronometrar() devolve a
+# própria função, medir() um contexto nulo e contar()/observar() só testam
+# uma flag: o custo nos caminhos quentes é praticamente zero.
+ATIVAS = os.getenv("METRICAS", "") not in ("", "0")
+
+# Exposição (só com METRICAS=1):
+#   METRICAS_PORTA=9100  servidor próprio com /metrics no formato Prometheus
+#                        (modo desktop; no modo web o asgi.py já serve /metrics)
+#   METRICAS_LOG_S=60    uma linha de resumo no log a cada N segundos
+PORTA = int(os.getenv("METRICAS_PORTA", "0"))
+INTERVALO_LOG = float(os.getenv("METRICAS_LOG_S", "0"))
+CAMINHO_ENDPOINT = "/metrics"
+
+# Limites (s) dos buckets dos histogramas de latência
+LIMITES_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Métricas conhecidas: nome -> (tipo, ajuda)
+DESCRICOES = {
+    "barbearia_rota_segundos": ("histogram", "Tempo do route_change: montar ou reaproveitar a view e enviar o update"),
+    "barbearia_view_construcao_segundos": ("histogram", "Tempo da função que constrói a view (só quando não está em cache)"),
+    "barbearia_armazenamento_segundos": ("histogram", "Duração das operações de leitura e gravação de agendamentos e usuários"),
+    "barbearia_escrita_segundos": ("histogram", "Duração de uma gravação durável (temporário, fsync e rename)"),
+    "barbearia_armazenamento_bytes_total": ("counter", "Bytes lidos e gravados em arquivos do armazenamento"),
+    "barbearia_login_segundos": ("histogram", "Latência do login, do clique em Entrar até a resposta"),
+    "barbearia_bcrypt_segundos": ("histogram", "Duração de cada hash ou verificação bcrypt"),
+    "barbearia_sessoes_ativas": ("gauge", "Sessões abertas no processo"),
+    "barbearia_sessoes_total": ("counter", "Sessões abertas desde o início do processo"),
+    # lidas na hora da coleta (registrar_coletor)
+    "barbearia_senhas_trabalhadores": ("gauge", "Threads do pool de senhas (bcrypt)"),
+    "barbearia_senhas_em_execucao": ("gauge", "Hashes bcrypt rodando agora"),
+    "barbearia_senhas_em_fila": ("gauge", "Pedidos de hash aguardando um trabalhador"),
+    "barbearia_senhas_concluidas_total": ("counter", "Hashes bcrypt concluídos (a vazão é a taxa deste contador)"),
+    "barbearia_senhas_recusadas_total": ("counter", "Pedidos recusados com a fila cheia"),
+    "barbearia_senhas_execucao_segundos_total": ("counter", "Tempo somado rodando bcrypt no pool"),
+    "barbearia_senhas_espera_segundos_total": ("counter", "Tempo somado dos pedidos esperando na fila"),
+    "barbearia_gravacoes_total": ("counter", "Gravações duráveis (temporário, fsync e rename) feitas"),
+    "barbearia_gravacoes_segundos_total": ("counter", "Tempo somado das gravações duráveis"),
+}
+
+logger = logging.getLogger("metricas")
+
+
+class _Histograma:
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES_S) + 1)  # último = +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.contagens[bisect_left(LIMITES_S, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q: float) -> float:
+        """Limite superior do bucket onde cai o quantil (estimativa, como no Prometheus)"""
+        alvo = q * self.total
+        acumulado = 0
+        for limite, n in zip(LIMITES_S + (float("inf"),), self.contagens):
+            acumulado += n
+            if acumulado >= alvo:
+                return limite
+        return float("inf")
+
+
+class Registro:
+    """Contadores, medidores e histogramas do processo, por nome e rótulos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valores = {}      # (nome, rótulos) -> número (counter e gauge)
+        self._histogramas = {}  # (nome, rótulos) -> _Histograma
+        self._coletores = []    # funções chamadas a cada coleta
+
+    def contar(self, nome: str, valor: float = 1, rotulos=()):
+        chave = (nome, rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, rotulos=()):
+        chave = (nome, rotulos)
+        with self._lock:
+            h = self._histogramas.get(chave)
+            if h is None:
+                h = self._histogramas[chave] = _Histograma()
+            h.observar(valor)
+
+    def registrar_coletor(self, coletor):
+        """coletor() -> [(nome, valor, {rótulo: valor})], lido a cada coleta (estado mantido por outro módulo)"""
+        with self._lock:
+            self._coletores.append(coletor)
+
+    def _coletados(self):
+        with self._lock:
+            coletores = list(self._coletores)
+        return [
+            ((nome, tuple(sorted(rotulos.items()))), valor)
+            for coletor in coletores
+            for nome, valor, rotulos in coletor()
+        ]
+
+    def limpar(self):
+        with self._lock:
+            self._valores.clear()
+            self._histogramas.clear()
+
+    def texto_prometheus(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)"""
+        coletados = self._coletados()
+        with self._lock:
+            valores = sorted(list(self._valores.items()) + coletados)
+            histogramas = sorted((k, (list(h.contagens), h.soma, h.total)) for k, h in self._histogramas.items())
+        linhas = []
+        cabecalhos = set()
+
+        def cabecalho(nome, tipo):
+            if nome not in cabecalhos:
+                cabecalhos.add(nome)
+                tipo, ajuda = DESCRICOES.get(nome, (tipo, ""))
+                if ajuda:
+                    linhas.append(f"# HELP {nome} {ajuda}")
+                linhas.append(f"# TYPE {nome} {tipo}")
+
+        for (nome, rotulos), valor in valores:
+            cabecalho(nome, "counter")
+            linhas.append(f"{nome}{_rotulos(rotulos)} {valor!r}")
+        for (nome, rotulos), (contagens, soma, total) in histogramas:
+            cabecalho(nome, "histogram")
+            acumulado = 0
+            for limite, n in zip(LIMITES_S + (float("inf"),), contagens):
+                acumulado += n
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                linhas.append(f"{nome}_bucket{_rotulos(rotulos + (('le', le),))} {acumulado}")
+            linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma:.6f}")
+            linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+        return "\n".join(linhas) + "\n"
+
+    def resumo(self) -> str:
+        """Uma linha com contagem, média e p95 de cada histograma e o valor dos demais"""
+        coletados = self._coletados()
+        with self._lock:
+            partes = [
+                f"{nome}{_rotulos(rotulos)} n={h.total} media={1000 * h.soma / h.total:.1f}ms "
+                f"p95<={1000 * h.quantil(0.95):g}ms"
+                for (nome, rotulos), h in sorted(self._histogramas.items()) if h.total
+            ]
+            valores = sorted(list(self._valores.items()) + coletados)
+        partes += [f"{nome}{_rotulos(rotulos)}={valor!r}" for (nome, rotulos), valor in valores]
+        return " | ".join(partes)
+
+
+def _rotulos(rotulos) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in rotulos) + "}"
+
+
+def _escapar(valor) -> str:
+    """Valor de rótulo no formato de texto do Prometheus: escapa \\, " e quebras de linha"""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRO = Registro()
+
+_NULO = nullcontext()
+
+
+class _Cronometro:
+    __slots__ = ("nome", "rotulos", "inicio")
+
+    def __init__(self, nome, rotulos):
+        self.nome = nome
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        REGISTRO.observar(self.nome, time.perf_counter() - self.inicio, self.rotulos)
+        return False
+
+
+# ---------- API usada pelo app ----------
+def contar(nome: str, valor: float = 1, **rotulos):
+    """Soma em um contador (ou medidor, com valor negativo)"""
+    if ATIVAS:
+        REGISTRO.contar(nome, valor, tuple(sorted(rotulos.items())))
+
+
+def observar(nome: str, segundos: float, **rotulos):
+    if ATIVAS:
+        REGISTRO.observar(nome, segundos, tuple(sorted(rotulos.items())))
+
+
+def medir(nome: str, **rotulos):
+    """with medir("nome", rotulo=...): registra a duração do bloco no histograma"""
+    if not ATIVAS:
+        return _NULO
+    return _Cronometro(nome, tuple(sorted(rotulos.items())))
+
+
+def registrar_coletor(coletor):
+    """Expõe em /metrics valores que outro módulo já mantém (só com as métricas ligadas)"""
+    if ATIVAS:
+        REGISTRO.registrar_coletor(coletor)
+
+
+def contar_bytes(arquivo, sentido: str):
+    """Soma o tamanho de um arquivo aberto (lido ou recém-gravado) ao contador de bytes"""
+    if ATIVAS:
+        REGISTRO.contar("barbearia_armazenamento_bytes_total", os.fstat(arquivo.fileno()).st_size,
+                        (("sentido", sentido),))
+
+
+def cronometrar(nome: str, **rotulos):
+    """Decorador: registra a duração de cada chamada (sem efeito com as métricas desligadas)"""
+    def decorador(funcao):
+        if not ATIVAS:
+            return funcao
+        chave = tuple(sorted(rotulos.items()))
+
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                REGISTRO.observar(nome, time.perf_counter() - inicio, chave)
+        return medida
+    return decorador
+
+
+# ---------- exposição ----------
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != CAMINHO_ENDPOINT:
+            self.send_error(404)
+            return
+        corpo = REGISTRO.texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass  # sem uma linha de log por coleta do Prometheus
+
+
+_exportacao_iniciada = False
+_exportacao_lock = threading.Lock()
+
+
+def iniciar_exportacao():
+    """Sobe o servidor /metrics e/ou o log periódico, uma vez por processo"""
+    global _exportacao_iniciada
+    if not ATIVAS or _exportacao_iniciada:
+        return
+    with _exportacao_lock:
+        if _exportacao_iniciada:
+            return
+        _exportacao_iniciada = True
+        if PORTA:
+            servidor = ThreadingHTTPServer(("0.0.0.0", PORTA), _HandlerMetricas)
+            threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+            logger.info("métricas em http://0.0.0.0:%d%s", PORTA, CAMINHO_ENDPOINT)
+        if INTERVALO_LOG > 0:
+            def registrar_periodicamente():
+                while True:
+                    time.sleep(INTERVALO_LOG)
+                    logger.info("métricas: %s", REGISTRO.resumo())
+            threading.Thread(target=registrar_periodicamente, name="metricas-log", daemon=True).start()
+
+
+def aplicar_endpoint_metricas(app):
+    """Middleware FastAPI: responde /metrics no próprio servidor web (modo ASGI)"""
+    if not ATIVAS:
+        return app
+
+    from starlette.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def metricas(request, call_next):
+        if request.url.path == CAMINHO_ENDPOINT:
+            return PlainTextResponse(REGISTRO.texto_prometheus(), media_type="text/plain; version=0.0.4")
+        return await call_next(request)
+
+    return app
@@ -0,0 +1,184 @@
+import threading
+from datetime import date
+
+import flet as ft
+from agendamento import get_indice_usuarios, nome_barbeiro
+from cache_views import ao_reexibir
+from registros import formatar_data, formatar_horario
+
+Colors = ft.Colors
+
+# Agendamentos carregados por vez na lista (a próxima página vem ao rolar
+# ou pelo botão "Carregar mais", caso a página não encha a tela)
+TAMANHO_PAGINA = 20
+
+# Altura fixa de cada item: a ListView só monta os itens visíveis
+ALTURA_ITEM = 72
+
+# Distância (px) do fim da lista em que a próxima página já é pedida
+MARGEM_CARREGAR = 300
+
+
+def _item_agendamento(a, hoje: int) -> ft.Container:
+    futuro = a["dia"] >= hoje
+    return ft.Container(
+        content=ft.Row(
+            controls=[
+                ft.Column(
+                    controls=[
+                        ft.Text(
+                            f"{formatar_data(a['dia'])} às {formatar_horario(a['minuto'])}",
+                            size=14,
+                            weight=ft.FontWeight.BOLD,
+                            color=Colors.WHITE,
+                        ),
+                        ft.Text(
+                            f"{a.get('servico') or 'Serviço'} · {nome_barbeiro(a.get('cadeira'))}",
+                            size=12,
+                            color=Colors.BLUE_GREY_100,
+                        ),
+                    ],
+                    spacing=2,
+                    expand=True,
+                ),
+                ft.Text(
+                    "Agendado" if futuro else "Realizado",
+                    size=11,
+                    color=Colors.GREEN_300 if futuro else Colors.BLUE_GREY_200,
+                ),
+            ],
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+        ),
+        height=ALTURA_ITEM - 8,
+        padding=10,
+        bgcolor=Colors.BLUE_GREY_700,
+        border_radius=6,
+    )
+
+
+def meus_agendamentos_view(page: ft.Page) -> ft.Column:
+    """Agendamentos do usuário logado, do mais recente ao mais antigo, em páginas"""
+    page.bgcolor = "#546b7b"
+
+    # Estado da lista: quantos itens já foram carregados, de qual usuário e o
+    # índice, conferido com o armazenamento a cada exibição
+    estado = {"usuario": None, "carregados": 0, "indice": None}
+    carregando = threading.Lock()
+
+    back_btn = ft.IconButton(
+        icon=ft.Icons.ARROW_BACK,
+        icon_color=Colors.WHITE,
+        on_click=lambda _: page.go("/home"),
+        style=ft.ButtonStyle(bgcolor=None, padding=10)
+    )
+
+    title = ft.Text(
+        "Meus Agendamentos",
+        size=22,
+        weight=ft.FontWeight.BOLD,
+        color=Colors.WHITE
+    )
+
+    total_text = ft.Text("", size=12, color=Colors.BLUE_GREY_100)
+
+    vazio_text = ft.Text(
+        "Você ainda não tem agendamentos.",
+        size=14,
+        color=Colors.BLUE_GREY_100,
+        visible=False,
+    )
+
+    def carregar_pagina():
+        """Acrescenta a próxima página à lista; False se não havia mais nada"""
+        if not carregando.acquire(blocking=False):
+            return False  # outro evento de rolagem já está carregando
+        try:
+            pagina = estado["indice"].pagina(estado["usuario"], estado["carregados"], TAMANHO_PAGINA)
+            if not pagina:
+                return False
+            hoje = date.today().toordinal()
+            lista.controls.extend(_item_agendamento(a, hoje) for a in pagina)
+            estado["carregados"] += len(pagina)
+            return True
+        finally:
+            carregando.release()
+
+    def ha_mais() -> bool:
+        return estado["carregados"] < estado["indice"].total(estado["usuario"])
+
+    def carregar_mais():
+        if carregar_pagina():
+            mais_btn.visible = ha_mais()
+            lista.update()
+            mais_btn.update()
+
+    def ao_rolar(e: ft.OnScrollEvent):
+        if e.pixels < e.max_scroll_extent - MARGEM_CARREGAR:
+            return
+        if ha_mais():
+            carregar_mais()
+
+    lista = ft.ListView(
+        controls=[],
+        item_extent=ALTURA_ITEM,
+        spacing=0,
+        padding=ft.padding.symmetric(horizontal=4),
+        on_scroll=ao_rolar,
+        on_scroll_interval=100,
+        expand=True,
+    )
+
+    # Sem rolagem (poucos itens ou tela alta) o on_scroll nunca dispara
+    mais_btn = ft.TextButton(
+        "Carregar mais",
+        style=ft.ButtonStyle(color=Colors.WHITE),
+        on_click=lambda _: carregar_mais(),
+        visible=False,
+    )
+
+    def recarregar():
+        """Volta para a primeira página (usuário atual, reservas novas)"""
+        estado["usuario"] = page.session.get("user") or page.client_storage.get("logged_user")
+        estado["indice"] = get_indice_usuarios()
+        estado["carregados"] = 0
+        lista.controls.clear()
+        carregar_pagina()
+        total = estado["indice"].total(estado["usuario"])
+        total_text.value = f"{total} agendamento(s)"
+        vazio_text.visible = total == 0
+        mais_btn.visible = ha_mais()
+
+    recarregar()
+
+    root = ft.Column(
+        controls=[
+            ft.Row(
+                controls=[back_btn],
+                alignment=ft.MainAxisAlignment.START
+            ),
+            ft.Container(
+                width=340,
+                padding=10,
+                expand=True,
+                content=ft.Column(
+                    controls=[
+                        title,
+                        total_text,
+                        ft.Divider(thickness=2, color=ft.Colors.WHITE24),
+                        vazio_text,
+                        lista,
+                        mais_btn,
+                    ],
+                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                    spacing=6,
+                    expand=True,
+                ),
+            ),
+        ],
+        spacing=10,
+        expand=True,
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+    )
+
+    # Ao voltar para a rota com a view em cache, mostra as reservas feitas desde então
+    return ao_reexibir(root, recarregar)
@@ -0,0 +1,137 @@
+from datetime import date
+
+import flet as ft
+from agendamento import AGREGADOS, EXPEDIENTE
+from agregados import AGENDAMENTOS, MINUTOS, RECEITA, capacidade_minutos, inicio_da_semana
+from cache_views import ao_reexibir
+from registros import formatar_data
+
+Colors = ft.Colors
+
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+
+
+def taxa_ocupacao(minutos: int, capacidade: int) -> float:
+    """Fração (0 a 1) da capacidade ocupada"""
+    return min(1.0, minutos / capacidade) if capacidade else 0.0
+
+
+def formatar_reais(centavos: int) -> str:
+    return f"R$ {centavos / 100:.2f}"
+
+
+def painel_admin_view(page: ft.Page) -> ft.Column:
+    """Painel do administrador: ocupação e receita por dia e por semana"""
+    page.bgcolor = "#546b7b"
+
+    # Segunda-feira da semana exibida
+    semana = {"inicio": inicio_da_semana(date.today().toordinal())}
+
+    back_btn = ft.IconButton(
+        icon=ft.Icons.ARROW_BACK,
+        icon_color=Colors.WHITE,
+        on_click=lambda _: page.go("/home"),
+        style=ft.ButtonStyle(bgcolor=None, padding=10)
+    )
+
+    title = ft.Text(
+        "Painel do Administrador",
+        size=22,
+        weight=ft.FontWeight.BOLD,
+        color=Colors.WHITE
+    )
+
+    semana_label = ft.Text("", size=14, weight=ft.FontWeight.W_500, color=Colors.BLUE_GREY_100)
+    resumo_semana = ft.Text("", size=13, color=Colors.WHITE)
+
+    # Linhas da tabela: uma por dia da semana, preenchidas por atualizar()
+    celulas = []
+    linhas = []
+    for nome in DIAS_SEMANA:
+        textos = [ft.Text("", size=12, color=Colors.WHITE) for _ in range(4)]
+        textos[0].value = nome
+        celulas.append(textos)
+        linhas.append(ft.DataRow(cells=[ft.DataCell(t) for t in textos]))
+
+    tabela = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("Dia", size=12, color=Colors.BLUE_GREY_100)),
+            ft.DataColumn(ft.Text("Agend.", size=12, color=Colors.BLUE_GREY_100), numeric=True),
+            ft.DataColumn(ft.Text("Ocupação", size=12, color=Colors.BLUE_GREY_100), numeric=True),
+            ft.DataColumn(ft.Text("Receita", size=12, color=Colors.BLUE_GREY_100), numeric=True),
+        ],
+        rows=linhas,
+        column_spacing=14,
+        horizontal_margin=6,
+    )
+
+    def atualizar():
+        """Lê os contadores materializados da semana (nada é reagregado aqui)"""
+        inicio = semana["inicio"]
+        semana_label.value = f"Semana de {formatar_data(inicio)} a {formatar_data(inicio + 6)}"
+        capacidade_semana = 0
+        for i, textos in enumerate(celulas):
+            dia = inicio + i
+            totais = AGREGADOS.dia(dia)
+            capacidade = capacidade_minutos(EXPEDIENTE, dia)
+            capacidade_semana += capacidade
+            textos[0].value = f"{DIAS_SEMANA[i]} {formatar_data(dia)[:5]}"
+            textos[1].value = str(totais[AGENDAMENTOS])
+            textos[2].value = f"{taxa_ocupacao(totais[MINUTOS], capacidade):.0%}"
+            textos[3].value = formatar_reais(totais[RECEITA])
+        totais = AGREGADOS.periodo(inicio, inicio + 6)
+        resumo_semana.value = (
+            f"Semana: {totais[AGENDAMENTOS]} agendamento(s) · "
+            f"ocupação {taxa_ocupacao(totais[MINUTOS], capacidade_semana):.0%} · "
+            f"{formatar_reais(totais[RECEITA])}"
+        )
+
+    def mudar_semana(delta):
+        semana["inicio"] += 7 * delta
+        atualizar()
+        page.update()
+
+    navegacao = ft.Row(
+        controls=[
+            ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, icon_color=Colors.WHITE,
+                          on_click=lambda _: mudar_semana(-1)),
+            semana_label,
+            ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, icon_color=Colors.WHITE,
+                          on_click=lambda _: mudar_semana(1)),
+        ],
+        alignment=ft.MainAxisAlignment.CENTER,
+    )
+
+    atualizar()
+
+    root = ft.Column(
+        controls=[
+            ft.Row(
+                controls=[back_btn],
+                alignment=ft.MainAxisAlignment.START
+            ),
+            ft.Container(
+                width=380,
+                padding=10,
+                content=ft.Column(
+                    controls=[
+                        title,
+                        ft.Divider(thickness=2, color=ft.Colors.WHITE24),
+                        navegacao,
+                        tabela,
+                        ft.Divider(thickness=1, color=ft.Colors.WHITE24),
+                        resumo_semana,
+                    ],
+                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                    spacing=8,
+                    scroll=ft.ScrollMode.AUTO,
+                ),
+            ),
+        ],
+        spacing=10,
+        expand=True,
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+    )
+
+    # Reexibida do cache: os contadores podem ter mudado com novas reservas
+    return ao_reexibir(root, atualizar)
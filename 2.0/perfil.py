@@ -0,0 +1,208 @@
+import asyncio
+import cProfile
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+import flet as ft
+
+# PROFILE liga o perfilamento sob demanda (como START_AT_LOGIN, sem mudar código):
+#   PROFILE=1 (ou "tudo")                        rotas e handlers de eventos
+#   PROFILE=rotas | PROFILE=handlers             só um dos dois
+#   PROFILE=/agendamento,confirmar_agendamento   só essas rotas / esses handlers
+# Cada execução perfilada grava em PROFILE_DIR um .prof (pstats, do cProfile)
+# e um .folded (pilhas amostradas, uma por linha, para flamegraph.pl ou
+# speedscope). Ficam só os PROFILE_MANTER mais recentes por rota/handler.
+#   python -m pstats storage/perfis/rota-agendamento.<...>.prof
+#   flamegraph.pl storage/perfis/rota-agendamento.<...>.folded > agendamento.svg
+MODOS = {m.strip() for m in os.getenv("PROFILE", "").split(",") if m.strip()} - {"0"}
+ATIVO = bool(MODOS)
+PASTA = os.getenv("PROFILE_DIR", os.path.join("storage", "perfis"))
+MANTER = int(os.getenv("PROFILE_MANTER", "20"))
+# Execuções mais rápidas que isso não são gravadas (só interessa o que está lento)
+MINIMO_MS = float(os.getenv("PROFILE_MIN_MS", "0"))
+# Intervalo entre amostras das pilhas (na prática limitado pelo switch interval do GIL, ~5 ms)
+INTERVALO_AMOSTRA_S = float(os.getenv("PROFILE_AMOSTRA_MS", "1")) / 1000
+
+_ESTE_ARQUIVO = os.path.abspath(__file__)
+_local = threading.local()
+_rotacao_lock = threading.Lock()
+
+
+def deve_perfilar(tipo: str, nome: str) -> bool:
+    return bool(MODOS & {"1", "tudo", tipo + "s", nome, nome.rsplit(".", 1)[-1]})
+
+
+def nome_handler(funcao) -> str:
+    """agendamento_view.<locals>.confirmar_agendamento -> agendamento_view.confirmar_agendamento"""
+    return getattr(funcao, "__qualname__", repr(funcao)).replace("<locals>.", "")
+
+
+class _Amostrador:
+    """Thread que amostra, a cada intervalo, a pilha das threads sendo perfiladas"""
+
+    def __init__(self, intervalo: float = INTERVALO_AMOSTRA_S):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._alvos = {}  # id da thread -> Counter de pilhas
+        self._ha_alvos = threading.Event()
+        self._thread = None
+
+    def registrar(self, tid: int) -> Counter:
+        amostras = Counter()
+        with self._lock:
+            self._alvos[tid] = amostras
+            self._ha_alvos.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._rodar, name="perfil-amostras", daemon=True)
+                self._thread.start()
+        return amostras
+
+    def remover(self, tid: int):
+        with self._lock:
+            self._alvos.pop(tid, None)
+            if not self._alvos:
+                self._ha_alvos.clear()
+
+    def _rodar(self):
+        while True:
+            self._ha_alvos.wait()
+            time.sleep(self.intervalo)
+            with self._lock:
+                alvos = list(self._alvos.items())
+            quadros = sys._current_frames()
+            for tid, amostras in alvos:
+                quadro = quadros.get(tid)
+                if quadro is not None:
+                    amostras[_pilha(quadro)] += 1
+
+
+def _pilha(quadro) -> str:
+    """Pilha no formato "collapsed": da raiz para a folha, separada por ";" """
+    partes = []
+    while quadro is not None:
+        codigo = quadro.f_code
+        if codigo.co_filename != _ESTE_ARQUIVO:
+            partes.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+        quadro = quadro.f_back
+    return ";".join(reversed(partes))
+
+
+_amostrador = _Amostrador()
+
+
+def _nome_arquivo(nome: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", nome).strip("_.") or "raiz"
+
+
+def _gravar(tipo: str, nome: str, perfil: cProfile.Profile, amostras: Counter, duracao_ms: float):
+    os.makedirs(PASTA, exist_ok=True)
+    prefixo = f"{tipo}-{_nome_arquivo(nome)}."
+    # nanossegundos com largura fixa: a ordem alfabética é a cronológica
+    base = os.path.join(PASTA, f"{prefixo}{time.time_ns()}.{os.getpid()}.{duracao_ms:.0f}ms")
+    perfil.dump_stats(base + ".prof")
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        for pilha, n in amostras.most_common():
+            f.write(f"{pilha} {n}\n")
+    _rotacionar(prefixo)
+
+
+def _rotacionar(prefixo: str):
+    """Apaga os dumps mais antigos do prefixo, mantendo os MANTER mais recentes"""
+    with _rotacao_lock:
+        dumps = sorted(n[:-len(".prof")] for n in os.listdir(PASTA) if n.startswith(prefixo) and n.endswith(".prof"))
+        for antigo in dumps[:-MANTER] if MANTER > 0 else dumps:
+            for extensao in (".prof", ".folded"):
+                try:
+                    os.remove(os.path.join(PASTA, antigo + extensao))
+                except FileNotFoundError:
+                    pass
+
+
+@contextmanager
+def perfilar(tipo: str, nome: str):
+    """with perfilar("rota", "/home"): perfila o bloco se o PROFILE pedir essa rota/handler.
+
+    Dentro de outro bloco perfilado na mesma thread (ex.: handler que chama
+    page.go) não abre um segundo perfil: o de fora já inclui tudo.
+    """
+    if not ATIVO or getattr(_local, "ativo", False) or not deve_perfilar(tipo, nome):
+        yield
+        return
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        # outro profiler já ativo (a partir do Python 3.12 é um por processo)
+        yield
+        return
+    _local.ativo = True
+    tid = threading.get_ident()
+    amostras = _amostrador.registrar(tid)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        _amostrador.remover(tid)
+        _local.ativo = False
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        if duracao_ms >= MINIMO_MS:
+            _gravar(tipo, nome, perfil, amostras, duracao_ms)
+
+
+def perfilado(tipo: str, nome: str, funcao):
+    @wraps(funcao)
+    def executar(*args, **kwargs):
+        with perfilar(tipo, nome):
+            return funcao(*args, **kwargs)
+    return executar
+
+
+def _evento_de_control(args) -> bool:
+    return bool(args) and isinstance(args[0], ft.ControlEvent) and args[0].target != "page"
+
+
+def instrumentar_pagina(page: ft.Page):
+    """Perfila os handlers de eventos dos controls da sessão (sem efeito com PROFILE desligado).
+
+    Handlers síncronos rodam via page.run_thread e os assíncronos são
+    aguardados em page.on_event_async; os dois são envolvidos aqui, sem
+    tocar nas views. Eventos da própria página (route_change) ficam de
+    fora: a rota é perfilada no route_change do main.
+    """
+    if not ATIVO:
+        return
+    run_thread = page.run_thread
+
+    def run_thread_perfilado(handler, *args, **kwargs):
+        if _evento_de_control(args):
+            handler = perfilado("handler", nome_handler(handler), handler)
+        run_thread(handler, *args, **kwargs)
+
+    page.run_thread = run_thread_perfilado
+
+    on_event_async = getattr(page, "on_event_async", None)
+    if on_event_async is None:
+        return
+
+    async def on_event_async_perfilado(e):
+        handler = None
+        control = getattr(page, "_index", {}).get(e.target) if e.target != "page" else None
+        if control is not None:
+            handler = control.event_handlers.get(e.name)
+        # handlers do próprio Flet (EventHandler de on_scroll etc.) só repassam
+        # ao do app, que, se síncrono, é perfilado no run_thread
+        if handler is None or not asyncio.iscoroutinefunction(handler) or handler.__module__.startswith("flet"):
+            return await on_event_async(e)
+        # o perfil fica ligado durante os awaits: inclui o que rodar no
+        # event loop da sessão nesse meio tempo
+        with perfilar("handler", nome_handler(handler)):
+            return await on_event_async(e)
+
+    page.on_event_async = on_event_async_perfilado
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metricas import registrar_coletor
+
+# Hashes bcrypt simultâneos (o bcrypt libera o GIL, então rodam em paralelo)
+TRABALHADORES = int(os.getenv("SENHAS_TRABALHADORES", str(min(4, os.cpu_count() or 1))))
+# Pedidos aguardando além dos que estão rodando; acima disso o pedido é recusado
+MAX_FILA = int(os.getenv("SENHAS_MAX_FILA", "64"))
+
+
+class FilaCheia(Exception):
+    """Muitos hashes aguardando: o pedido foi recusado em vez de enfileirado"""
+
+
+class PoolSenhas:
+    """Executa bcrypt fora da thread do handler, com concorrência e fila limitadas"""
+
+    def __init__(self, trabalhadores: int = TRABALHADORES, max_fila: int = MAX_FILA):
+        self.trabalhadores = max(1, trabalhadores)
+        self.max_fila = max_fila
+        self._executor = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pendentes = 0      # enviados e ainda não concluídos
+        self._em_execucao = 0
+        self._concluidas = 0
+        self._recusadas = 0
+        self._tempo_execucao = 0.0
+        self._tempo_espera = 0.0
+        self._inicio = time.monotonic()
+
+    def _rodar(self, enviado_em, fn, args):
+        comeco = time.monotonic()
+        with self._lock:
+            self._em_execucao += 1
+            self._tempo_espera += comeco - enviado_em
+        try:
+            return fn(*args)
+        finally:
+            fim = time.monotonic()
+            with self._lock:
+                self._em_execucao -= 1
+                self._pendentes -= 1
+                self._concluidas += 1
+                self._tempo_execucao += fim - comeco
+
+    async def executar(self, fn, *args):
+        """Roda fn(*args) no pool e aguarda o resultado sem bloquear o event loop"""
+        with self._lock:
+            if self._pendentes >= self.trabalhadores + self.max_fila:
+                self._recusadas += 1
+                raise FilaCheia()
+            self._pendentes += 1
+        futuro = self._executor.submit(self._rodar, time.monotonic(), fn, args)
+        try:
+            return await asyncio.wrap_future(futuro)
+        except asyncio.CancelledError:
+            # cancelado antes de começar: _rodar não vai descontar o pendente
+            if futuro.cancel():
+                with self._lock:
+                    self._pendentes -= 1
+            raise
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            decorrido = time.monotonic() - self._inicio
+            concluidas = self._concluidas
+            return {
+                "trabalhadores": self.trabalhadores,
+                "em_execucao": self._em_execucao,
+                "em_fila": self._pendentes - self._em_execucao,
+                "concluidas": concluidas,
+                "recusadas": self._recusadas,
+                "vazao_por_s": concluidas / decorrido if decorrido else 0.0,
+                "execucao_media_ms": 1000 * self._tempo_execucao / concluidas if concluidas else 0.0,
+                "espera_media_ms": 1000 * self._tempo_espera / concluidas if concluidas else 0.0,
+                "execucao_total_s": self._tempo_execucao,
+                "espera_total_s": self._tempo_espera,
+            }
+
+    def metricas(self):
+        """Estado do pool para o /metrics (os totais permitem calcular taxa e médias por janela)"""
+        e = self.estatisticas()
+        return [
+            ("barbearia_senhas_trabalhadores", e["trabalhadores"], {}),
+            ("barbearia_senhas_em_execucao", e["em_execucao"], {}),
+            ("barbearia_senhas_em_fila", e["em_fila"], {}),
+            ("barbearia_senhas_concluidas_total", e["concluidas"], {}),
+            ("barbearia_senhas_recusadas_total", e["recusadas"], {}),
+            ("barbearia_senhas_execucao_segundos_total", e["execucao_total_s"], {}),
+            ("barbearia_senhas_espera_segundos_total", e["espera_total_s"], {}),
+        ]
+
+
+# Pool compartilhado por todas as sessões do processo
+pool = PoolSenhas()
+registrar_coletor(pool.metricas)
+
+
+async def executar(fn, *args):
+    return await pool.executar(fn, *args)
+
+
+def estatisticas() -> dict:
+    return pool.estatisticas()
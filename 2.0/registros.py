@@ -0,0 +1,102 @@
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+
+from disponibilidade import CADEIRA_PADRAO
+from expediente import PASSO_MIN, para_horario, para_minutos
+
+# Versão do formato dos agendamentos gravados
+#   1: {"data": "dd/mm/YYYY", "horario": "HH:MM", "data_criacao": "dd/mm/YYYY HH:MM", ...}
+#   2: {"dia": ordinal da data, "minuto": minuto do dia, "criado_em": epoch (s), ...}
+# Inteiros ordenam cronologicamente: ordenar e filtrar por data dispensa strptime.
+VERSAO_ESQUEMA = 2
+
+CAMPOS = ("usuario", "dia", "minuto", "duracao", "cadeira", "servico", "observacoes", "criado_em")
+
+# Valores para registros sem o campo (anteriores às durações e às cadeiras)
+PADROES = {"duracao": PASSO_MIN, "cadeira": CADEIRA_PADRAO, "servico": "", "observacoes": "", "criado_em": 0}
+
+logger = logging.getLogger("registros")
+
+
+# ---------- conversões (entrada) ----------
+@lru_cache(maxsize=4096)
+def dia_de_data(data_str: str) -> int:
+    """"dd/mm/YYYY" -> ordinal da data (ValueError se inválida)"""
+    return datetime.strptime(data_str, "%d/%m/%Y").toordinal()
+
+
+def minuto_de_horario(horario: str) -> int:
+    """"HH:MM" -> minutos desde 00:00"""
+    return para_minutos(horario)
+
+
+def _criado_em_v1(texto: str) -> int:
+    try:
+        return int(datetime.strptime(texto, "%d/%m/%Y %H:%M").timestamp())
+    except (TypeError, ValueError):
+        return 0
+
+
+def canonico(agendamento) -> dict:
+    """Agendamento no formato atual (converte registros da versão 1)"""
+    if "dia" in agendamento:
+        a = {c: agendamento.get(c, PADROES.get(c)) for c in CAMPOS}
+    else:
+        a = {c: PADROES.get(c) for c in CAMPOS}
+        a.update({k: v for k, v in agendamento.items() if k in CAMPOS})
+        a["dia"] = dia_de_data(agendamento.get("data", ""))
+        a["minuto"] = minuto_de_horario(agendamento.get("horario", ""))
+        a["criado_em"] = _criado_em_v1(agendamento.get("data_criacao"))
+    a["cadeira"] = a["cadeira"] or CADEIRA_PADRAO
+    a["duracao"] = a["duracao"] or PASSO_MIN
+    return a
+
+
+def migrar_registros(agendamentos, versao: int = 1):
+    """Converte uma lista gravada na `versao` para o formato atual.
+
+    Registros ilegíveis (data ou horário inválidos) são descartados, com
+    um aviso no log de quantos foram.
+    """
+    if versao >= VERSAO_ESQUEMA:
+        return list(agendamentos)
+    convertidos = []
+    descartados = 0
+    for a in agendamentos:
+        try:
+            convertidos.append(canonico(a))
+        except (AttributeError, ValueError):
+            descartados += 1
+    if descartados:
+        logger.warning(
+            "%d agendamento(s) da versão %d descartado(s) na conversão: data ou horário inválidos",
+            descartados, versao,
+        )
+    return convertidos
+
+
+def chave_vaga(a):
+    """(dia, minuto, cadeira): identifica a vaga ocupada por um agendamento"""
+    return a.get("dia"), a.get("minuto"), a.get("cadeira") or CADEIRA_PADRAO
+
+
+def chave_ordem(a):
+    return a["dia"], a["minuto"], a.get("cadeira") or CADEIRA_PADRAO
+
+
+@lru_cache(maxsize=1024)
+def mes_do_dia(dia: int):
+    """(ano, mês) de um ordinal"""
+    d = date.fromordinal(dia)
+    return d.year, d.month
+
+
+# ---------- formatação (só na exibição) ----------
+@lru_cache(maxsize=1024)
+def formatar_data(dia: int) -> str:
+    return date.fromordinal(dia).strftime("%d/%m/%Y")
+
+
+def formatar_horario(minuto: int) -> str:
+    return para_horario(minuto)
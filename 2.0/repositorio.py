@@ -0,0 +1,772 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from escrita_duravel import gravar_json
+from metricas import contar, contar_bytes
+from registros import (
+    CAMPOS,
+    PADROES,
+    VERSAO_ESQUEMA,
+    chave_vaga,
+    mes_do_dia,
+    migrar_registros,
+)
+from travas import Trava
+
+# Arquivos de armazenamento de agendamentos
+DATA_DIR = "storage"
+AGENDAMENTOS_FILE = os.path.join(DATA_DIR, "agendamentos.json")
+AGENDAMENTOS_DB = os.path.join(DATA_DIR, "agendamentos.db")
+AGENDAMENTOS_JOURNAL = os.path.join(DATA_DIR, "agendamentos.journal")
+# Backend mensal: uma partição por mês (2026-10.json); meses encerrados vão
+# comprimidos para arquivo/2026-09.json.gz
+AGENDAMENTOS_DIR = os.path.join(DATA_DIR, "agendamentos")
+PASTA_ARQUIVO = "arquivo"
+
+# Backend usado pelo app: "json" (padrão), "journal", "sqlite" ou "mensal"
+BACKEND_PADRAO = "json"
+
+# Segundos entre compactações do journal (0 desliga o compactador)
+INTERVALO_COMPACTACAO = float(os.getenv("AGENDAMENTOS_COMPACTAR_S", "60"))
+
+# Chave da trava de escrita do arquivo inteiro; as travas por dia usam o
+# ordinal da data (sempre > 0), então não colidem com ela
+TRAVA_ESCRITA = 0
+
+# Tabela do SQLite da versão 1, mantida intacta depois da migração
+TABELA_V1 = "agendamentos_v1"
+
+logger = logging.getLogger("repositorio")
+
+# Registros seguem o esquema de registros.py (dia ordinal, minuto do dia).
+# Arquivos JSON gravam {"versao": VERSAO_ESQUEMA, "agendamentos": [...]};
+# arquivos sem "versao" são da versão 1 e são convertidos na leitura.
+
+
+def mesma_vaga(a, b) -> bool:
+    """Mesmo início, no mesmo dia e na mesma cadeira"""
+    return chave_vaga(a) == chave_vaga(b)
+
+
+def _documento(agendamentos):
+    return {"versao": VERSAO_ESQUEMA, "agendamentos": agendamentos}
+
+
+def _registros(documento):
+    """Agendamentos de um documento JSON lido, convertidos para o esquema atual"""
+    return migrar_registros(documento.get("agendamentos", []), documento.get("versao", 1))
+
+
+def _assinatura_arquivo(caminho):
+    """(inode, mtime, tamanho) do arquivo, ou None se ele não existe"""
+    try:
+        st = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _linha(agendamento):
+    """Valores de um agendamento na ordem de CAMPOS (para INSERT)"""
+    return tuple(agendamento.get(c, PADROES.get(c, "")) for c in CAMPOS)
+
+
+class RepositorioAgendamentos:
+    """Interface comum dos backends de agendamentos
+
+    Cada backend expõe `trava` (travas por chave entre threads e processos),
+    usada pelas reservas para serializar as operações de um mesmo dia.
+    """
+
+    trava: Trava
+
+    def garantir_armazenamento(self):
+        raise NotImplementedError
+
+    def listar(self):
+        """Retorna todos os agendamentos como lista de dicts"""
+        raise NotImplementedError
+
+    def salvar_todos(self, agendamentos):
+        """Substitui todo o conteúdo do armazenamento"""
+        raise NotImplementedError
+
+    def adicionar(self, agendamento) -> bool:
+        """Grava um agendamento. Retorna False se o horário já estiver ocupado na cadeira"""
+        raise NotImplementedError
+
+    def agendamentos_do_dia(self, dia: int):
+        """Retorna os agendamentos de um dia (ordinal), com minuto e duração"""
+        raise NotImplementedError
+
+    def horarios_ocupados(self, dia: int):
+        """Retorna os inícios (minuto do dia) já reservados em um dia"""
+        return [a["minuto"] for a in self.agendamentos_do_dia(dia)]
+
+    def listar_ativos(self, desde: int):
+        """Agendamentos do dia `desde` (ordinal) em diante: o que a agenda ainda usa"""
+        return [a for a in self.listar() if a["dia"] >= desde]
+
+    def assinatura(self):
+        """Valor que muda a cada gravação, deste ou de outro processo (comparar com ==)
+
+        Serve para caches derivados do armazenamento saberem, sem reler
+        tudo, se precisam ser refeitos.
+        """
+        raise NotImplementedError
+
+# --------------------------
+# Backend JSON (arquivo único, comportamento original)
+# --------------------------
+class RepositorioJSON(RepositorioAgendamentos):
+    def __init__(self, caminho=AGENDAMENTOS_FILE):
+        self.caminho = caminho
+        self.trava = Trava(caminho + ".lock")
+
+    def garantir_armazenamento(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        if not os.path.exists(self.caminho):
+            with open(self.caminho, "w", encoding="utf-8") as f:
+                json.dump(_documento([]), f, indent=2, ensure_ascii=False)
+
+    def listar(self):
+        self.garantir_armazenamento()
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                contar_bytes(f, "leitura")
+                return _registros(json.load(f))
+        except Exception:
+            return []
+
+    def _gravar(self, agendamentos):
+        self.garantir_armazenamento()
+        gravar_json(self.caminho, _documento(agendamentos))
+
+    def salvar_todos(self, agendamentos):
+        with self.trava.trava(TRAVA_ESCRITA):
+            self._gravar(agendamentos)
+
+    def adicionar(self, agendamento) -> bool:
+        # ler-alterar-gravar do arquivo inteiro: serializado entre threads e processos
+        with self.trava.trava(TRAVA_ESCRITA):
+            agendamentos = self.listar()
+            for a in agendamentos:
+                if mesma_vaga(a, agendamento):
+                    return False
+            agendamentos.append(agendamento)
+            self._gravar(agendamentos)
+        return True
+
+    def agendamentos_do_dia(self, dia: int):
+        return [a for a in self.listar() if a["dia"] == dia]
+
+    def assinatura(self):
+        # toda gravação é um rename atômico: inode novo
+        return _assinatura_arquivo(self.caminho)
+
+
+# --------------------------
+# Backend SQLite (índice único em (dia, minuto, cadeira), inserts de uma linha)
+# --------------------------
+class RepositorioSQLite(RepositorioAgendamentos):
+    def __init__(self, caminho=AGENDAMENTOS_DB):
+        self.caminho = caminho
+        self.trava = Trava(caminho + ".lock")
+        # uma conexão por thread: handlers do Flet rodam em threads diferentes
+        self._local = threading.local()
+        self._schema_ok = False
+        # conexão que nunca grava: o data_version dela muda a cada commit das outras
+        self._conexao_versao = None
+        self._versao_lock = threading.Lock()
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def garantir_armazenamento(self):
+        if self._schema_ok:
+            return
+        conn = self._conexao()
+        with conn:
+            colunas = {r[1] for r in conn.execute("PRAGMA table_info(agendamentos)")}
+            antigos = None
+            if "data" in colunas:
+                # banco da versão 1 (data/horário em texto): recria a tabela no esquema
+                # atual; a antiga só muda de nome, para nada se perder na conversão
+                antigos = [dict(r) for r in conn.execute("SELECT * FROM agendamentos ORDER BY id")]
+                conn.execute(f"ALTER TABLE agendamentos RENAME TO {TABELA_V1}")
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS agendamentos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    usuario TEXT NOT NULL,
+                    dia INTEGER NOT NULL,
+                    minuto INTEGER NOT NULL,
+                    duracao INTEGER NOT NULL DEFAULT {PADROES["duracao"]},
+                    cadeira INTEGER NOT NULL DEFAULT {PADROES["cadeira"]},
+                    servico TEXT NOT NULL DEFAULT '',
+                    observacoes TEXT NOT NULL DEFAULT '',
+                    criado_em INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # o mesmo horário pode ser reservado uma vez por cadeira; o prefixo
+            # (dia) também atende às consultas por dia e por período
+            conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_agendamentos_vaga "
+                "ON agendamentos (dia, minuto, cadeira)"
+            )
+            if antigos:
+                antes = conn.total_changes
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO agendamentos ({', '.join(CAMPOS)}) "
+                    f"VALUES ({', '.join('?' for _ in CAMPOS)})",
+                    [_linha(a) for a in migrar_registros(antigos)],
+                )
+                migrados = conn.total_changes - antes
+                nivel = logging.WARNING if migrados < len(antigos) else logging.INFO
+                logger.log(
+                    nivel, "%s: %d de %d agendamento(s) da versão 1 migrado(s); originais em %s",
+                    self.caminho, migrados, len(antigos), TABELA_V1,
+                )
+            conn.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+        self._schema_ok = True
+
+    def listar(self):
+        self.garantir_armazenamento()
+        rows = self._conexao().execute(
+            f"SELECT {', '.join(CAMPOS)} FROM agendamentos ORDER BY id"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def salvar_todos(self, agendamentos):
+        self.garantir_armazenamento()
+        conn = self._conexao()
+        with conn:
+            conn.execute("DELETE FROM agendamentos")
+            conn.executemany(
+                f"INSERT OR IGNORE INTO agendamentos ({', '.join(CAMPOS)}) "
+                f"VALUES ({', '.join('?' for _ in CAMPOS)})",
+                [_linha(a) for a in agendamentos],
+            )
+
+    def adicionar(self, agendamento) -> bool:
+        self.garantir_armazenamento()
+        conn = self._conexao()
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT INTO agendamentos ({', '.join(CAMPOS)}) "
+                    f"VALUES ({', '.join('?' for _ in CAMPOS)})",
+                    _linha(agendamento),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def agendamentos_do_dia(self, dia: int):
+        self.garantir_armazenamento()
+        rows = self._conexao().execute(
+            f"SELECT {', '.join(CAMPOS)} FROM agendamentos WHERE dia = ?", (dia,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def listar_ativos(self, desde: int):
+        self.garantir_armazenamento()
+        rows = self._conexao().execute(
+            f"SELECT {', '.join(CAMPOS)} FROM agendamentos WHERE dia >= ?", (desde,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def assinatura(self):
+        self.garantir_armazenamento()
+        with self._versao_lock:
+            if self._conexao_versao is None:
+                self._conexao_versao = sqlite3.connect(self.caminho, timeout=10, check_same_thread=False)
+            return self._conexao_versao.execute("PRAGMA data_version").fetchone()[0]
+
+# --------------------------
+# Backend journal (snapshot JSON + uma linha por reserva, compactado em segundo plano)
+# --------------------------
+class RepositorioJournal(RepositorioAgendamentos):
+    """Cada reserva acrescenta uma linha JSON ao journal (O(1) por gravação).
+
+    O estado é o snapshot (mesmo formato do backend JSON) mais as linhas do
+    journal. Um compactador em segundo plano incorpora o journal ao snapshot
+    periodicamente. Acréscimos, releituras e compactação usam a trava de
+    escrita, então vários processos podem compartilhar os arquivos.
+    """
+
+    def __init__(self, caminho=AGENDAMENTOS_FILE, journal=AGENDAMENTOS_JOURNAL,
+                 intervalo_compactacao: float = INTERVALO_COMPACTACAO):
+        self.caminho = caminho
+        self.journal = journal
+        self.trava = Trava(caminho + ".lock")
+        self.intervalo_compactacao = intervalo_compactacao
+        self._lock = threading.Lock()
+        self._agendamentos = []
+        self._por_dia = {}
+        self._offset = 0            # bytes do journal já aplicados em memória
+        self._linhas = 0            # linhas do journal ainda não compactadas
+        self._assinatura = None     # identifica o snapshot carregado
+        self._compactador = None
+
+    # ---------- arquivos ----------
+    def garantir_armazenamento(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        if not os.path.exists(self.caminho):
+            gravar_json(self.caminho, _documento([]))
+        if not os.path.exists(self.journal):
+            open(self.journal, "ab").close()
+        self._iniciar_compactador()
+
+    def _assinatura_snapshot(self):
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _aplicar(self, agendamento):
+        self._agendamentos.append(agendamento)
+        self._por_dia.setdefault(agendamento["dia"], []).append(agendamento)
+
+    def _repetido(self, agendamento) -> bool:
+        return any(mesma_vaga(a, agendamento) for a in self._por_dia.get(agendamento["dia"], []))
+
+    def _sincronizar(self):
+        """Traz para a memória o que outros processos gravaram (chamar com a trava de escrita)"""
+        assinatura = self._assinatura_snapshot()
+        if assinatura != self._assinatura:
+            try:
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    contar_bytes(f, "leitura")
+                    snapshot = _registros(json.load(f))
+            except Exception:
+                snapshot = []
+            self._agendamentos = []
+            self._por_dia = {}
+            for a in snapshot:
+                self._aplicar(a)
+            self._offset = 0
+            self._linhas = 0
+            self._assinatura = assinatura
+        self._ler_journal()
+
+    def _ler_journal(self):
+        try:
+            with open(self.journal, "rb") as f:
+                f.seek(self._offset)
+                bloco = f.read()
+        except FileNotFoundError:
+            return
+        if not bloco:
+            return
+        contar("barbearia_armazenamento_bytes_total", len(bloco), sentido="leitura")
+        inicio = 0
+        while inicio < len(bloco):
+            fim = bloco.find(b"\n", inicio)
+            if fim < 0:
+                break  # linha ainda sem quebra: gravação interrompida
+            linha = bloco[inicio:fim]
+            inicio = fim + 1
+            if not linha.strip():
+                continue
+            try:
+                agendamento = json.loads(linha)
+                if "dia" not in agendamento:
+                    agendamento = migrar_registros([agendamento])[0]  # linha da versão 1
+            except (ValueError, IndexError):
+                continue  # linha corrompida no meio do journal: ignorada
+            self._linhas += 1
+            # horário já presente na cadeira: sobra de uma compactação interrompida
+            if not self._repetido(agendamento):
+                self._aplicar(agendamento)
+        self._offset += inicio
+        if inicio < len(bloco):
+            # última linha rasgada (processo morto no meio da escrita): descartar
+            with open(self.journal, "r+b") as f:
+                f.truncate(self._offset)
+
+    # ---------- operações ----------
+    def listar(self):
+        self.garantir_armazenamento()
+        with self._lock, self.trava.trava(TRAVA_ESCRITA):
+            self._sincronizar()
+            return list(self._agendamentos)
+
+    def agendamentos_do_dia(self, dia: int):
+        self.garantir_armazenamento()
+        with self._lock, self.trava.trava(TRAVA_ESCRITA):
+            self._sincronizar()
+            return list(self._por_dia.get(dia, []))
+
+    def adicionar(self, agendamento) -> bool:
+        self.garantir_armazenamento()
+        linha = (json.dumps(agendamento, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock, self.trava.trava(TRAVA_ESCRITA):
+            self._sincronizar()
+            if self._repetido(agendamento):
+                return False
+            with open(self.journal, "ab") as f:
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+            self._aplicar(agendamento)
+            self._offset += len(linha)
+            self._linhas += 1
+        return True
+
+    def salvar_todos(self, agendamentos):
+        self.garantir_armazenamento()
+        with self._lock, self.trava.trava(TRAVA_ESCRITA):
+            self._gravar_snapshot(list(agendamentos))
+
+    def assinatura(self):
+        # reservas só crescem o journal; compactação e salvar_todos trocam o snapshot
+        return _assinatura_arquivo(self.caminho), _assinatura_arquivo(self.journal)
+
+    def compactar(self) -> int:
+        """Incorpora o journal ao snapshot. Retorna quantas linhas foram incorporadas"""
+        self.garantir_armazenamento()
+        with self._lock, self.trava.trava(TRAVA_ESCRITA):
+            self._sincronizar()
+            if self._offset == 0:
+                return 0
+            linhas = self._linhas
+            self._gravar_snapshot(list(self._agendamentos))
+            return linhas
+
+    def _gravar_snapshot(self, agendamentos):
+        # snapshot primeiro (rename atômico), journal depois: se o processo morrer
+        # entre os dois passos, a releitura encontra as reservas nos dois lugares
+        # e _ler_journal descarta as repetidas
+        gravar_json(self.caminho, _documento(agendamentos))
+        with open(self.journal, "wb"):
+            pass
+        self._agendamentos = []
+        self._por_dia = {}
+        for a in agendamentos:
+            self._aplicar(a)
+        self._offset = 0
+        self._linhas = 0
+        self._assinatura = self._assinatura_snapshot()
+
+    def _iniciar_compactador(self):
+        if self._compactador is not None or not self.intervalo_compactacao:
+            return
+        with self._lock:
+            if self._compactador is not None:
+                return
+
+            def loop():
+                while True:
+                    time.sleep(self.intervalo_compactacao)
+                    try:
+                        self.compactar()
+                    except Exception:
+                        pass  # tenta de novo no próximo ciclo
+
+            self._compactador = threading.Thread(target=loop, name="compactador-agendamentos", daemon=True)
+            self._compactador.start()
+
+
+# --------------------------
+# Backend mensal (uma partição JSON por mês, meses encerrados arquivados em gzip)
+# --------------------------
+class RepositorioMensal(RepositorioAgendamentos):
+    """Agendamentos particionados por mês da data do atendimento.
+
+    Reservas e consultas de um dia leem e gravam só a partição do mês, então
+    a latência não cresce com o histórico. Cada partição fica em memória e é
+    relida só quando o arquivo muda (outro processo gravou). Meses anteriores
+    ao atual são comprimidos em arquivo/ (automaticamente na virada do mês ou
+    com `python repositorio.py arquivar`); listar() ainda os inclui.
+    """
+
+    def __init__(self, pasta=AGENDAMENTOS_DIR):
+        self.pasta = pasta
+        self.arquivo = os.path.join(pasta, PASTA_ARQUIVO)
+        self.trava = Trava(pasta + ".lock")
+        # escrita de cada partição: chave ano * 12 + mês, em arquivo próprio
+        # para não colidir com as travas por dia
+        self._trava_particoes = Trava(pasta + ".particoes.lock")
+        self._lock = threading.Lock()
+        self._cache = {}  # (ano, mês) -> (assinatura do arquivo, agendamentos)
+        self._arquivado_ate = None
+
+    # ---------- arquivos ----------
+    def _caminho(self, ano: int, mes: int) -> str:
+        return os.path.join(self.pasta, f"{ano:04d}-{mes:02d}.json")
+
+    def _caminho_arquivo(self, ano: int, mes: int) -> str:
+        return os.path.join(self.arquivo, f"{ano:04d}-{mes:02d}.json.gz")
+
+    @staticmethod
+    def _mes_do_nome(nome: str):
+        try:
+            return int(nome[0:4]), int(nome[5:7])
+        except ValueError:
+            return None
+
+    def _meses(self, pasta, sufixo):
+        try:
+            nomes = os.listdir(pasta)
+        except FileNotFoundError:
+            return []
+        return sorted(m for m in (self._mes_do_nome(n) for n in nomes if n.endswith(sufixo)) if m)
+
+    def garantir_armazenamento(self):
+        os.makedirs(self.arquivo, exist_ok=True)
+        hoje = time.localtime()
+        atual = (hoje.tm_year, hoje.tm_mon)
+        if self._arquivado_ate != atual:
+            self._arquivado_ate = atual
+            self.arquivar(*atual)
+
+    def _ler_particao(self, ano: int, mes: int):
+        """Agendamentos do mês ativo (cópia), relendo o arquivo só se ele mudou"""
+        caminho = self._caminho(ano, mes)
+        try:
+            st = os.stat(caminho)
+            assinatura = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            assinatura = None
+        with self._lock:
+            guardado = self._cache.get((ano, mes))
+            if guardado is not None and guardado[0] == assinatura:
+                return list(guardado[1])
+        agendamentos = []
+        if assinatura is not None:
+            try:
+                with open(caminho, "r", encoding="utf-8") as f:
+                    contar_bytes(f, "leitura")
+                    agendamentos = _registros(json.load(f))
+            except Exception:
+                agendamentos = []
+        with self._lock:
+            self._cache[(ano, mes)] = (assinatura, agendamentos)
+        return list(agendamentos)
+
+    def _gravar_particao(self, ano: int, mes: int, agendamentos):
+        caminho = self._caminho(ano, mes)
+        if agendamentos:
+            gravar_json(caminho, _documento(agendamentos))
+        else:
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._cache.pop((ano, mes), None)
+
+    def _ler_arquivo(self, ano: int, mes: int):
+        try:
+            with gzip.open(self._caminho_arquivo(ano, mes), "rt", encoding="utf-8") as f:
+                return _registros(json.load(f))
+        except FileNotFoundError:
+            return []
+
+    # ---------- operações ----------
+    def listar(self):
+        """Todos os agendamentos, inclusive os meses arquivados (relatórios)"""
+        self.garantir_armazenamento()
+        agendamentos = []
+        for ano, mes in self._meses(self.arquivo, ".json.gz"):
+            agendamentos.extend(self._ler_arquivo(ano, mes))
+        for ano, mes in self._meses(self.pasta, ".json"):
+            agendamentos.extend(self._ler_particao(ano, mes))
+        return agendamentos
+
+    def _listar_meses(self, inicio, fim):
+        """Agendamentos das partições ativas de inicio a fim ((ano, mês), inclusive)"""
+        agendamentos = []
+        for m in self._meses(self.pasta, ".json"):
+            if inicio <= m <= fim:
+                agendamentos.extend(self._ler_particao(*m))
+        return agendamentos
+
+    def listar_ativos(self, desde: int):
+        """Só as partições do mês de `desde` em diante: não toca no arquivo"""
+        self.garantir_armazenamento()
+        return [a for a in self._listar_meses(mes_do_dia(desde), (9999, 12)) if a["dia"] >= desde]
+
+    def agendamentos_do_dia(self, dia: int):
+        self.garantir_armazenamento()
+        return [a for a in self._ler_particao(*mes_do_dia(dia)) if a["dia"] == dia]
+
+    def assinatura(self):
+        # partições ativas mudam por rename (inode novo); o arquivo só ganha meses
+        ativas = tuple((m, _assinatura_arquivo(self._caminho(*m))) for m in self._meses(self.pasta, ".json"))
+        return ativas, tuple(self._meses(self.arquivo, ".json.gz"))
+
+    def adicionar(self, agendamento) -> bool:
+        self.garantir_armazenamento()
+        ano, mes = mes_do_dia(agendamento["dia"])
+        # ler-alterar-gravar só da partição do mês
+        with self._trava_particoes.trava(ano * 12 + mes):
+            agendamentos = self._ler_particao(ano, mes)
+            if any(mesma_vaga(a, agendamento) for a in agendamentos):
+                return False
+            agendamentos.append(agendamento)
+            self._gravar_particao(ano, mes, agendamentos)
+        return True
+
+    def salvar_todos(self, agendamentos):
+        self.garantir_armazenamento()
+        por_mes = {}
+        for a in agendamentos:
+            por_mes.setdefault(mes_do_dia(a["dia"]), []).append(a)
+        with self.trava.trava(TRAVA_ESCRITA):
+            # meses que não aparecem mais ficam vazios (partição removida)
+            for m in set(por_mes) | set(self._meses(self.pasta, ".json")):
+                with self._trava_particoes.trava(m[0] * 12 + m[1]):
+                    self._gravar_particao(*m, por_mes.get(m, []))
+
+    def arquivar(self, ano: int, mes: int) -> int:
+        """Comprime as partições anteriores a (ano, mês). Retorna quantos meses foram arquivados"""
+        arquivados = 0
+        with self.trava.trava(TRAVA_ESCRITA):
+            for m in self._meses(self.pasta, ".json"):
+                if m >= (ano, mes):
+                    break
+                with self._trava_particoes.trava(m[0] * 12 + m[1]):
+                    # mês já arquivado antes (ex.: salvar_todos com datas antigas): junta
+                    agendamentos = self._ler_arquivo(*m)
+                    vagas = {chave_vaga(a) for a in agendamentos}
+                    agendamentos.extend(a for a in self._ler_particao(*m) if chave_vaga(a) not in vagas)
+                    destino = self._caminho_arquivo(*m)
+                    tmp = f"{destino}.{os.getpid()}.tmp"
+                    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                        json.dump(_documento(agendamentos), f, ensure_ascii=False)
+                    with open(tmp, "rb") as f:
+                        os.fsync(f.fileno())
+                    os.replace(tmp, destino)
+                    # só remove a partição depois que o arquivo comprimido está no disco
+                    self._gravar_particao(*m, [])
+                    arquivados += 1
+        return arquivados
+
+
+# --------------------------
+# Seleção do backend e migração
+# --------------------------
+_repositorio = None
+_repositorio_lock = threading.Lock()
+
+
+def criar_repositorio(backend: str | None = None) -> RepositorioAgendamentos:
+    backend = (backend or os.getenv("AGENDAMENTOS_BACKEND") or BACKEND_PADRAO).lower()
+    if backend == "sqlite":
+        return RepositorioSQLite()
+    if backend == "journal":
+        return RepositorioJournal()
+    if backend == "json":
+        return RepositorioJSON()
+    if backend == "mensal":
+        return RepositorioMensal()
+    raise ValueError(f"Backend de agendamentos desconhecido: {backend}")
+
+
+def get_repositorio() -> RepositorioAgendamentos:
+    """Retorna o repositório do processo (escolhido por AGENDAMENTOS_BACKEND)"""
+    global _repositorio
+    if _repositorio is None:
+        with _repositorio_lock:
+            if _repositorio is None:
+                _repositorio = criar_repositorio()
+    return _repositorio
+
+
+def set_repositorio(repositorio: RepositorioAgendamentos | None):
+    """Troca o repositório do processo (None volta a usar AGENDAMENTOS_BACKEND)"""
+    global _repositorio
+    with _repositorio_lock:
+        _repositorio = repositorio
+
+
+def migrar_json_para_sqlite(json_path=AGENDAMENTOS_FILE, db_path=AGENDAMENTOS_DB) -> int:
+    """Copia os agendamentos do JSON para o SQLite. Retorna quantos foram inseridos"""
+    origem = RepositorioJSON(json_path).listar()
+    destino = RepositorioSQLite(db_path)
+    destino.garantir_armazenamento()
+    conn = destino._conexao()
+    antes = conn.total_changes
+    # uma única transação; duplicados de (dia, minuto, cadeira) são ignorados
+    with conn:
+        conn.executemany(
+            f"INSERT OR IGNORE INTO agendamentos ({', '.join(CAMPOS)}) "
+            f"VALUES ({', '.join('?' for _ in CAMPOS)})",
+            [_linha(a) for a in origem],
+        )
+    return conn.total_changes - antes
+
+
+def migrar_json_para_mensal(json_path=AGENDAMENTOS_FILE, pasta=AGENDAMENTOS_DIR) -> int:
+    """Distribui os agendamentos do JSON nas partições mensais. Retorna quantos foram gravados"""
+    origem = RepositorioJSON(json_path).listar()
+    destino = RepositorioMensal(pasta)
+    existentes = destino.listar()
+    vagas = {chave_vaga(a) for a in existentes}
+    novos = [a for a in origem if chave_vaga(a) not in vagas]
+    # salvar_todos grava mês a mês; os meses encerrados voltam comprimidos para o arquivo
+    destino.salvar_todos(existentes + novos)
+    hoje = time.localtime()
+    destino.arquivar(hoje.tm_year, hoje.tm_mon)
+    return len(novos)
+
+
+def migrar_esquema(repositorio: RepositorioAgendamentos | None = None) -> int:
+    """Regrava o armazenamento no esquema atual (VERSAO_ESQUEMA).
+
+    A leitura já converte registros antigos; isto só persiste a conversão
+    de uma vez. Retorna quantos agendamentos foram regravados.
+    """
+    repositorio = repositorio or get_repositorio()
+    agendamentos = repositorio.listar()
+    repositorio.salvar_todos(agendamentos)
+    if isinstance(repositorio, RepositorioMensal):
+        # meses arquivados voltaram às partições: comprime de novo, já convertidos
+        hoje = time.localtime()
+        repositorio.arquivar(hoje.tm_year, hoje.tm_mon)
+    return len(agendamentos)
+
+
+USO = (
+    "Uso: python repositorio.py migrar [agendamentos.json] [agendamentos.db]\n"
+    "     python repositorio.py particionar [agendamentos.json] [pasta]\n"
+    "     python repositorio.py arquivar [pasta]\n"
+    "     python repositorio.py esquema   (backend de AGENDAMENTOS_BACKEND)"
+)
+
+
+if __name__ == "__main__":
+    comando = sys.argv[1] if len(sys.argv) >= 2 else ""
+    if comando == "migrar":
+        args = sys.argv[2:4]
+        total = migrar_json_para_sqlite(*args)
+        print(f"{total} agendamento(s) migrado(s) para o SQLite")
+    elif comando == "particionar":
+        total = migrar_json_para_mensal(*sys.argv[2:4])
+        print(f"{total} agendamento(s) migrado(s) para as partições mensais")
+    elif comando == "esquema":
+        total = migrar_esquema()
+        print(f"{total} agendamento(s) regravado(s) no esquema v{VERSAO_ESQUEMA}")
+    elif comando == "arquivar":
+        hoje = time.localtime()
+        total = RepositorioMensal(*sys.argv[2:3]).arquivar(hoje.tm_year, hoje.tm_mon)
+        print(f"{total} mês(es) arquivado(s)")
+    else:
+        print(USO)
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from enum import Enum
+
+from travas import TravaOcupada
+
+
+class StatusReserva(Enum):
+    CONFIRMADA = "confirmada"
+    CONFLITO = "conflito"
+    INVALIDA = "invalida"
+
+
+@dataclass(frozen=True)
+class ResultadoReserva:
+    """Resultado de uma tentativa de reserva, para a view transformar em snackbar"""
+
+    status: StatusReserva
+    agendamento: dict | None = None
+    mensagem: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status is StatusReserva.CONFIRMADA
+
+
+def chave_do_dia(dia) -> int:
+    """Chave da trava do dia: o próprio ordinal (nunca 0, reservado à escrita do arquivo)"""
+    if not isinstance(dia, int) or isinstance(dia, bool) or dia <= 0:
+        raise ValueError(f"dia inválido: {dia!r}")
+    return dia
+
+
+def reservar(repositorio, indice, agendamento, preferencia=None) -> ResultadoReserva:
+    """Reserva atômica de um horário.
+
+    Segura a trava do dia (threads do processo + faixa do arquivo de travas
+    entre processos), relê a ocupação do dia no armazenamento, escolhe uma
+    cadeira em que o intervalo inteiro do serviço (horário + duração) esteja
+    livre (a preferida, se houver), grava e só então atualiza o índice.
+    Reservas em dias diferentes não se bloqueiam.
+
+    O agendamento do resultado traz a cadeira atribuída em "cadeira".
+    """
+    dia = agendamento.get("dia")
+    minuto = agendamento.get("minuto")
+    duracao = agendamento.get("duracao")
+    try:
+        chave = chave_do_dia(dia)
+    except ValueError:
+        return ResultadoReserva(StatusReserva.INVALIDA, agendamento, "Data inválida.")
+    if minuto not in indice.minutos:
+        return ResultadoReserva(StatusReserva.INVALIDA, agendamento, "Horário inválido.")
+    if not indice.no_expediente(dia, minuto, duracao, preferencia):
+        # fora do expediente do dia (do barbeiro escolhido) ou atravessando uma pausa
+        return ResultadoReserva(
+            StatusReserva.INVALIDA, agendamento, "Esse serviço não cabe nesse horário."
+        )
+
+    try:
+        with repositorio.trava.trava(chave):
+            # outro processo pode ter reservado: a fonte da verdade é o armazenamento
+            indice.atualizar_dia(dia, repositorio.agendamentos_do_dia(dia))
+            cadeira = indice.alocar(dia, minuto, duracao, preferencia)
+            if cadeira is not None:
+                agendamento = {**agendamento, "cadeira": cadeira}
+            if cadeira is None or not repositorio.adicionar(agendamento):
+                return ResultadoReserva(
+                    StatusReserva.CONFLITO,
+                    agendamento,
+                    "Esse horário acabou de ser reservado. Escolha outro.",
+                )
+            indice.marcar(dia, minuto, duracao, cadeira)
+    except TravaOcupada:
+        # outro processo segurou o dia (ou o arquivo) por tempo demais: nada foi gravado
+        return ResultadoReserva(
+            StatusReserva.CONFLITO, agendamento, "Agenda ocupada no momento. Tente novamente."
+        )
+    return ResultadoReserva(StatusReserva.CONFIRMADA, agendamento, "Agendamento confirmado com sucesso!")
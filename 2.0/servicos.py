@@ -1,17 +1,27 @@
 import flet as ft
+from expediente import PASSO_MIN
 
 try:
     Colors = ft.Colors
 except Exception:
     Colors = ft.Colors
 
+# duracao em minutos: define quantos horários consecutivos o serviço ocupa
 SERVICOS = [
-    {"nome": "Corte", "preco": 40.00},
-    {"nome": "Barba", "preco": 30.00},
-    {"nome": "Corte + Barba", "preco": 60.00},
+    {"nome": "Corte", "preco": 40.00, "duracao": 30},
+    {"nome": "Barba", "preco": 30.00, "duracao": 30},
+    {"nome": "Corte + Barba", "preco": 60.00, "duracao": 60},
 ]
 
 
+def duracao_servico(nome) -> int:
+    """Duração (min) do serviço; sem serviço escolhido vale um passo da agenda"""
+    for s in SERVICOS:
+        if s["nome"] == nome:
+            return s["duracao"]
+    return PASSO_MIN
+
+
 def servico_view(page: ft.Page) -> ft.Column:
     """Página para selecionar tipo de serviço"""
     page.bgcolor = "#546b7b"
@@ -35,7 +45,7 @@ def servico_view(page: ft.Page) -> ft.Column:
     for s in SERVICOS:
         nome_servico = s["nome"]
         preco_servico = s["preco"]
-        texto_botao = f"{nome_servico}\nR$ {preco_servico:.2f}"
+        texto_botao = f"{nome_servico}\nR$ {preco_servico:.2f} · {s['duracao']} min"
         
         def make_on_click(serv_nome):
             def _(_e):
@@ -0,0 +1,166 @@
+import errno
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: usa msvcrt
+    import msvcrt
+
+# Tempo máximo (s) tentando a faixa antes de desistir (Windows, e POSIX sem
+# travas por descritor quando o kernel acusa deadlock)
+ESPERA_MAXIMA_S = float(os.getenv("TRAVA_ESPERA_MAXIMA_S", "10"))
+
+# Linux: travas de faixa por descritor aberto (OFD). As do lockf pertencem ao
+# processo, e o detector de deadlock do kernel trata todas as threads como
+# um só dono: threads travando chaves aninhadas (dia -> arquivo -> partição)
+# em processos diferentes recebem EDEADLK sem haver deadlock de verdade.
+F_OFD_SETLKW = getattr(fcntl, "F_OFD_SETLKW", None)
+_usar_ofd = F_OFD_SETLKW is not None
+
+
+class TravaOcupada(TimeoutError):
+    """A faixa continuou travada por outro processo além de ESPERA_MAXIMA_S"""
+
+
+def _esperar(limite, espera, mensagem):
+    """Pausa com backoff entre tentativas; TravaOcupada ao passar do limite"""
+    if time.monotonic() >= limite:
+        raise TravaOcupada(mensagem)
+    time.sleep(espera)
+    return min(espera * 2, 0.05)
+
+
+class TravasPorChave:
+    """Um threading.Lock por chave, criado sob demanda e descartado quando ninguém usa"""
+
+    def __init__(self):
+        self._guarda = threading.Lock()
+        self._travas = {}  # chave -> [lock, usuários]
+
+    @contextmanager
+    def trava(self, chave):
+        with self._guarda:
+            entrada = self._travas.get(chave)
+            if entrada is None:
+                entrada = self._travas[chave] = [threading.Lock(), 0]
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                yield
+        finally:
+            with self._guarda:
+                entrada[1] -= 1
+                if entrada[1] == 0:
+                    self._travas.pop(chave, None)
+
+
+class ArquivoDeTravas:
+    """Travas entre processos por faixa de bytes de um arquivo.
+
+    Cada chave inteira corresponde a um byte do arquivo, então chaves
+    diferentes não se bloqueiam. O descritor fica aberto durante toda a
+    vida do processo: no POSIX, fechar qualquer descritor do arquivo
+    liberaria todas as travas do processo. Processos filhos (fork) abrem o
+    seu: as travas OFD pertencem ao descritor, e um herdado seria o mesmo
+    dono no pai e em todos os filhos.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._fd = None
+        self._pid = None
+        self._abrir_lock = threading.Lock()
+
+    def _descritor(self):
+        if self._pid != os.getpid():
+            with self._abrir_lock:
+                if self._pid != os.getpid():
+                    os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+                    self._fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+                    self._pid = os.getpid()
+        return self._fd
+
+    @contextmanager
+    def trava(self, chave: int):
+        fd = self._descritor()
+        if fcntl is not None:
+            ofd = self._travar_posix(fd, chave)
+            try:
+                yield
+            finally:
+                if ofd:
+                    _fcntl_ofd(fd, fcntl.F_UNLCK, chave)
+                else:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, chave, os.SEEK_SET)
+        else:
+            self._travar_msvcrt(fd, chave)
+            try:
+                yield
+            finally:
+                with self._abrir_lock:
+                    os.lseek(fd, chave, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+    def _travar_posix(self, fd, chave: int) -> bool:
+        """Trava a faixa da chave; True se a trava é por descritor (OFD)"""
+        global _usar_ofd
+        if _usar_ofd:
+            try:
+                _fcntl_ofd(fd, fcntl.F_WRLCK, chave)
+                return True
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise
+                _usar_ofd = False  # kernel anterior ao 3.15
+        # travas do processo: EDEADLK pode ser falso positivo (ver F_OFD_SETLKW),
+        # então tenta de novo até o limite
+        espera = 0.001
+        limite = time.monotonic() + ESPERA_MAXIMA_S
+        while True:
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, 1, chave, os.SEEK_SET)
+                return False
+            except OSError as e:
+                if e.errno != errno.EDEADLK:
+                    raise
+            espera = _esperar(limite, espera, f"{self.caminho}: chave {chave} em deadlock aparente")
+
+    def _travar_msvcrt(self, fd, chave: int):
+        # msvcrt trava a partir da posição atual, então lseek + locking fica
+        # sob _abrir_lock. A tentativa é não bloqueante: esperar outro processo
+        # segurando _abrir_lock pararia as outras chaves (dias) do processo.
+        espera = 0.001
+        limite = time.monotonic() + ESPERA_MAXIMA_S
+        while True:
+            with self._abrir_lock:
+                os.lseek(fd, chave, os.SEEK_SET)
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    return
+                except OSError:
+                    pass
+            espera = _esperar(limite, espera, f"{self.caminho}: chave {chave} travada por outro processo")
+
+
+def _fcntl_ofd(fd, tipo, chave: int):
+    # struct flock: l_type, l_whence, l_start, l_len, l_pid (0 nas travas OFD)
+    fcntl.fcntl(fd, F_OFD_SETLKW, struct.pack("hhqqi", tipo, os.SEEK_SET, chave, 1, 0))
+
+
+class Trava:
+    """Combina a trava local (threads) com a trava de arquivo (processos) por chave"""
+
+    def __init__(self, caminho):
+        self.locais = TravasPorChave()
+        self.arquivo = ArquivoDeTravas(caminho)
+
+    @contextmanager
+    def trava(self, chave: int):
+        with self.locais.trava(chave):
+            with self.arquivo.trava(chave):
+                yield